@@ -0,0 +1,220 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date
+
+import main
+
+# Event-loop front end for the same API as the Flask app:
+#   uvicorn asgi:app --workers 4
+# One loop holds thousands of idle keep-alive connections (keystroke
+# traffic) without a thread each. CPU work runs in a small scoring pool and
+# SQLite in a separate DB pool, so neither blocks the loop or the other.
+SCORE_WORKERS = int(os.environ.get('SCORE_WORKERS', min(4, os.cpu_count() or 1)))
+DB_WORKERS = int(os.environ.get('DB_WORKERS', 4))
+MAX_BODY = 1 << 20
+
+# ============================= ASYNC DB =============================
+class AsyncDB:
+    # Awaitable wrappers around main's history store helpers. Each call runs
+    # on the DB pool so store I/O never blocks the loop. Check history
+    # goes through the write-behind queue: the common case is a non-blocking
+    # put on the loop; only when the queue is full does the blocking,
+    # back-pressured put move to the pool.
+    def __init__(self, workers=DB_WORKERS):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='async-db')
+
+    async def call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def save_check(self, password, strength, label, entropy):
+        row = (password, strength, label, entropy)
+        if not main.history_writer.try_submit(row):
+            await self.call(main.history_writer.submit, row)
+
+    async def save_favorite(self, password):
+        await self.call(main.save_favorite, password)
+
+    async def history_page(self, limit, before):
+        return await self.call(main.get_history_page, limit, before)
+
+    async def favorites_page(self, limit, before):
+        return await self.call(main.get_favorites_page, limit, before)
+
+    async def seen(self, password):
+        return await self.call(main.times_seen, password)
+
+    async def counts(self):
+        return await self.call(main.get_counts)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        main.history_writer.flush()
+
+db = AsyncDB()
+score_pool = ThreadPoolExecutor(SCORE_WORKERS, thread_name_prefix='score')
+
+async def score(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(score_pool, fn, *args)
+
+# ============================= HANDLERS =============================
+class Request:
+    __slots__ = ('method', 'path', 'args', 'headers', 'body')
+
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+
+    def json(self):
+        data = json.loads(self.body or b'null')
+        if not isinstance(data, dict):
+            raise ValueError('expected a JSON object')
+        return data
+
+async def home(req):
+    # Rendering and gzipping the page is CPU work, so the first request (the
+    # only one that does it) runs it in the scoring pool like any scoring.
+    page = main.load_home_page() if main.load_home_page.loaded() else await score(main.load_home_page)
+    body, gzipped, etag, modified = page
+    headers = [(b'vary', b'Accept-Encoding'), (b'cache-control', b'no-cache'),
+               (b'last-modified', http_date(modified).encode())]
+    if 'gzip' in req.headers.get('accept-encoding', ''):
+        body, etag = gzipped, etag + '-gz'
+        headers.append((b'content-encoding', b'gzip'))
+    headers.append((b'etag', f'"{etag}"'.encode()))
+    if req.headers.get('if-none-match') == f'"{etag}"':
+        return 304, headers, b''
+    return 200, headers + [(b'content-type', b'text/html; charset=utf-8')], body
+
+async def check(req):
+    data = req.json()
+    pwd = data.get('password', '').strip()
+    use_ml = data.get('scorer') == 'ml'
+    if use_ml and main.load_ml_model() is None:
+        return {'error': 'ml scorer is not enabled'}, 400
+    if not pwd:
+        return {'error': 'empty'}, 200
+    result = await score(main.check_result, pwd, use_ml)
+    await db.save_check(pwd, result['strength'], result['label'], result['entropy'])
+    return result, 200
+
+async def generate(req):
+    # Policy tables can take a moment to build the first time, so this is
+    # offloaded as well.
+    return await score(main.generate_payload, req.json())
+
+async def favorite(req):
+    pwd = req.json().get('password', '')
+    if not pwd:
+        return {'error': 'empty'}, 200
+    await db.save_favorite(pwd)
+    return {'status': 'saved'}, 200
+
+async def favorites(req):
+    try:
+        limit, before = main.page_args(req.args, 20)
+    except ValueError:
+        return {'error': 'invalid cursor'}, 400
+    rows, next_cursor = await db.favorites_page(limit, before)
+    return {'favorites': rows, 'next_cursor': next_cursor, 'hashed': main.history_hashed()}, 200
+
+async def api_history(req):
+    try:
+        limit, before = main.page_args(req.args, 100)
+    except ValueError:
+        return {'error': 'invalid cursor'}, 400
+    rows, next_cursor = await db.history_page(limit, before)
+    return {'history': rows, 'next_cursor': next_cursor, 'hashed': main.history_hashed()}, 200
+
+async def api_counts(req):
+    checks, saved = await db.counts()
+    return {'history': checks, 'favorites': saved}, 200
+
+async def api_history_seen(req):
+    pwd = req.json().get('password')
+    if not isinstance(pwd, str) or not pwd:
+        return {'error': 'password must be a non-empty string'}, 400
+    return {'seen': await db.seen(pwd)}, 200
+
+ROUTES = {
+    ('GET', '/'): home,
+    ('POST', '/check'): check,
+    ('POST', '/generate'): generate,
+    ('POST', '/favorite'): favorite,
+    ('GET', '/favorites'): favorites,
+    ('GET', '/api/history'): api_history,
+    ('POST', '/api/history/seen'): api_history_seen,
+    ('GET', '/api/counts'): api_counts
+}
+
+# ============================= ASGI =============================
+async def read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        size += len(chunks[-1])
+        if size > MAX_BODY:
+            raise ValueError('request body too large')
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def send_response(send, status, headers, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': headers + [(b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+def json_response(payload, status):
+    return status, [(b'content-type', b'application/json')], json.dumps(payload).encode()
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await asyncio.get_running_loop().run_in_executor(None, main.prewarm)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await asyncio.get_running_loop().run_in_executor(None, db.close)
+            score_pool.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    started = time.perf_counter()
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        known = any(path == scope['path'] for _, path in ROUTES)
+        status, headers, body = json_response({'error': 'method not allowed' if known else 'not found'},
+                                              405 if known else 404)
+    else:
+        try:
+            raw = await read_body(receive)
+            if raw is None:
+                return
+            result = await handler(Request(scope, raw))
+            status, headers, body = result if isinstance(result[0], int) else json_response(*result)
+        except ValueError as e:
+            # Malformed or oversized JSON bodies (json.JSONDecodeError is a ValueError).
+            status, headers, body = json_response({'error': str(e)}, 400)
+    await send_response(send, status, headers, body)
+    timer = main.route_timers.get(scope['path'] if handler else None) or main.route_timers[None]
+    timer.observe(time.perf_counter() - started)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:app', host=os.environ.get('HOST', '127.0.0.1'), port=int(os.environ.get('PORT', 8000)),
+                workers=int(os.environ.get('WEB_CONCURRENCY', 1)))
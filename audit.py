@@ -0,0 +1,101 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from main import calculate_strength, check_breach_similarity
+
+FIELDS = ['line', 'strength', 'label', 'entropy', 'breached', 'suggestions']
+
+# ============================= PIPELINE =============================
+def read_passwords(stream):
+    for lineno, line in enumerate(stream, 1):
+        pw = line.rstrip('\r\n')
+        if pw:
+            yield lineno, pw
+
+def chunked(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+def score_chunk(chunk):
+    rows = []
+    for lineno, pw in chunk:
+        strength, label, _, suggestions, entropy = calculate_strength(pw)
+        rows.append({
+            'line': lineno,
+            'password': pw,
+            'strength': strength,
+            'label': label,
+            'entropy': entropy,
+            'breached': check_breach_similarity(pw),
+            'suggestions': suggestions
+        })
+    return rows
+
+def score_chunks(chunks, workers):
+    if workers <= 1:
+        yield from map(score_chunk, chunks)
+        return
+    # Keep only a small window of chunks in flight so memory stays flat no
+    # matter how large the input is; results still come out in input order.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# ============================= OUTPUT =============================
+def write_jsonl(rows, out, fields):
+    for row in rows:
+        out.write(json.dumps({k: row[k] for k in fields}) + '\n')
+
+def write_csv(rows, out, fields):
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(['; '.join(row[k]) if k == 'suggestions' else row[k] for k in fields])
+
+def rows_from(chunks):
+    for chunk in chunks:
+        yield from chunk
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a newline-delimited password file.")
+    parser.add_argument('input', nargs='?', default='-', help="password file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file, or - for stdout")
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('-w', '--workers', type=int, default=1, help="scoring processes")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--show-passwords', action='store_true', help="include the password in each row")
+    args = parser.parse_args(argv)
+
+    fields = (['password'] if args.show_passwords else []) + FIELDS
+    # Breach dumps are rarely clean UTF-8, so stdin is decoded like a file argument.
+    if args.input == '-':
+        src = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace', newline='')
+    else:
+        src = open(args.input, encoding='utf-8', errors='replace', newline='')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        chunks = score_chunks(chunked(read_passwords(src), args.chunk_size), args.workers)
+        writer = write_csv if args.format == 'csv' else write_jsonl
+        writer(rows_from(chunks), out, fields)
+    finally:
+        # Detaching leaves sys.stdin usable after an in-process run.
+        src.detach() if args.input == '-' else src.close()
+        if out is not sys.stdout: out.close()
+
+if __name__ == '__main__':
+    main()
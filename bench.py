@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+COLD_START_BUDGET_PATH = os.path.join(ROOT, 'benchmarks', 'cold_start_budget.json')
+
+# ============================= CORPORA =============================
+def corpora(seed=7, size=1000):
+    # Fixed seed so every run (and the stored baseline) scores the same inputs.
+    rnd = random.Random(seed)
+    printable = string.ascii_letters + string.digits + string.punctuation
+    words = ['password', 'admin', 'letmein', 'dragon', 'monkey', 'qwerty', 'sunshine', 'welcome']
+    # Mixed scripts, emoji, combining marks and non-ASCII digits (Arabic-Indic,
+    # Devanagari), which take the isdecimal() branch.
+    unicode_chars = 'äöüßéñçøåłžšđ' + 'абвгдежзий' + 'αβγδεζηθ' + '日本語漢字' + '٠١٢٣٤٥٦٧٨٩' + '०१२३' + '😀🔒🎉' + '́̈'
+
+    def rand(chars, lo, hi):
+        return ''.join(rnd.choice(chars) for _ in range(rnd.randint(lo, hi)))
+
+    adversarial = [
+        'a' * 5000 + '!',                        # one long run
+        '\n' * 5000,                             # runs that must not count as triples
+        '1' * 5000,
+        '123' * 2000,                            # dense weak-sequence matches
+        'passwor' * 1000 + 'd',                  # near-miss dictionary prefixes
+        'Aa1!' * 2500,
+        ''.join(rnd.choice(printable) for _ in range(10000)),
+        'é' * 3000
+    ]
+    return {
+        'short': [rand(string.ascii_lowercase + string.digits, 4, 10) for _ in range(size)],
+        'long': [rand(printable, 64, 256) for _ in range(size)],
+        'unicode': [rand(unicode_chars + string.ascii_letters, 8, 32) for _ in range(size)],
+        'adversarial': adversarial,
+        'realistic': [rnd.choice(words).capitalize() + rand(string.digits, 1, 4) + rnd.choice('!@#$')
+                      for _ in range(size)]
+    }
+
+# ============================= MEASUREMENT =============================
+def measure(fn, inputs, budget=0.5, min_ops=50, max_ops=200000):
+    # Runs fn over inputs round-robin until the time budget is spent, timing
+    # each call on its own so p50/p99 come from real per-op latencies.
+    for item in inputs[:min(len(inputs), 10)]:
+        fn(item)
+    timings = []
+    clock = time.perf_counter
+    start = clock()
+    i = 0
+    while len(timings) < max_ops and (len(timings) < min_ops or clock() - start < budget):
+        item = inputs[i % len(inputs)]
+        t0 = clock()
+        fn(item)
+        timings.append(clock() - t0)
+        i += 1
+    total = sum(timings)
+    timings.sort()
+    return {
+        'ops': len(timings),
+        'ops_per_sec': round(len(timings) / total, 1) if total else None,
+        'p50_us': round(timings[len(timings) // 2] * 1e6, 2),
+        'p99_us': round(timings[max(0, int(len(timings) * 0.99) - 1)] * 1e6, 2),
+        'max_us': round(timings[-1] * 1e6, 2)
+    }
+
+def cases(app, data):
+    # name -> (callable, inputs)
+    suite = {}
+    for corpus in ('short', 'long', 'unicode', 'adversarial'):
+        inputs = data[corpus]
+        suite[f'calculate_strength/{corpus}'] = (app.calculate_strength, inputs)
+        suite[f'calculate_entropy/{corpus}'] = (app.calculate_entropy, inputs)
+        suite[f'check_breach_similarity/{corpus}'] = (app.check_breach_similarity, inputs)
+    # Guess estimation with its repeat-base cache cleared, so every call pays
+    # for the full match search; worst64 holds the slowest known 64-char shapes.
+    estimator = app.load_estimator()
+
+    def estimate(pw):
+        estimator.base_guesses_log10.cache_clear()
+        estimator.guesses_log10(pw)
+
+    suite['estimate/worst64'] = (estimate, list(estimator.worst_case_inputs().values()))
+    suite['estimate/long'] = (estimate, data['long'])
+    suite['estimate/adversarial'] = (estimate, data['adversarial'])
+    suite['generate_secure_password/18'] = (lambda n: app.generate_secure_password(n), [18])
+    suite['generate_secure_password/128'] = (lambda n: app.generate_secure_password(n), [128])
+
+    def save(pw):
+        app.save_check(pw, 50, 'Medium', 40.0)
+
+    def save_durable(pw):
+        save(pw)
+        app.history_writer.flush()
+
+    suite['save_check/enqueue'] = (save, data['short'])
+    suite['save_check/durable'] = (save_durable, data['short'])
+
+    client = app.app.test_client()
+
+    def post_check(pw):
+        response = client.post('/check', json={'password': pw})
+        assert response.status_code == 200
+
+    # unique: more distinct passwords than the result cache holds, so most
+    # requests score from scratch; repeat: a small hot set that stays cached.
+    mixed = data['realistic'] + data['short'] + data['long'] + data['unicode']
+    unique = [f'{pw}{i}' for i, pw in enumerate(mixed * (app.strength_cache.maxsize // len(mixed) + 2))]
+    suite['check_e2e/unique'] = (post_check, unique)
+    suite['check_e2e/repeat'] = (post_check, data['realistic'][:50])
+    return suite
+
+def run(budget=0.5, only=None):
+    # main opens its SQLite file relative to the working directory, so the
+    # suite runs in a scratch directory and never touches a real history DB.
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='bench-'))
+    try:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import main as app
+
+        results = {}
+        for name, (fn, inputs) in cases(app, corpora()).items():
+            if only and not any(token in name for token in only):
+                continue
+            if name.startswith('check_e2e/'):
+                app.strength_cache.clear()
+            results[name] = measure(fn, inputs, budget)
+            app.history_writer.flush()
+            print(f"{name:40} {results[name]['ops_per_sec']:>12,.0f} ops/s  "
+                  f"p50 {results[name]['p50_us']:>10.1f}us  p99 {results[name]['p99_us']:>10.1f}us  "
+                  f"max {results[name]['max_us']:>10.1f}us", file=sys.stderr)
+    finally:
+        os.chdir(cwd)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'budget': budget
+        },
+        'results': results
+    }
+
+# ============================= COLD START =============================
+# Runs in a fresh interpreter per sample, like a serverless cold start: time
+# to import main, then the first /check and the first page render, then
+# whatever prewarm() still had to load.
+COLD_START_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+loaded = [load.__name__ for load in main.LAZY_LOADERS if load.loaded()]
+client = main.app.test_client()
+assert client.post('/check', json={'password': 'Tr0ub4dor&3'}).status_code == 200
+checked = time.perf_counter()
+assert client.get('/').status_code == 200
+rendered = time.perf_counter()
+main.prewarm()
+warmed = time.perf_counter()
+main.history_writer.close()
+json.dump({'import_ms': (imported - start) * 1000, 'first_check_ms': (checked - imported) * 1000,
+           'first_page_ms': (rendered - checked) * 1000, 'prewarm_ms': (warmed - rendered) * 1000,
+           'loaded_at_import': loaded}, sys.stdout)
+'''
+
+def cold_start(runs=10, modes=('lazy', 'prewarm')):
+    # Modes are interleaved run by run so background noise hits them equally.
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    env.pop('PREWARM', None)
+    samples = {mode: [] for mode in modes}
+    for _ in range(runs):
+        for mode in modes:
+            workdir = tempfile.mkdtemp(prefix='bench-cold-')
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, '-c', COLD_START_PROBE], cwd=workdir,
+                                 env=dict(env, PREWARM='1') if mode == 'prewarm' else env,
+                                 capture_output=True, text=True, check=True).stdout
+            sample = json.loads(out)
+            sample['process_ms'] = (time.perf_counter() - start) * 1000
+            samples[mode].append(sample)
+    results = {}
+    for mode, rows in samples.items():
+        result = results[mode] = {key: round(statistics.median(row[key] for row in rows), 2)
+                                  for key in rows[0] if key.endswith('_ms')}
+        result['loaded_at_import'] = sorted({name for row in rows for name in row['loaded_at_import']})
+        print(f"{mode:8} import {result['import_ms']:7.1f}ms  first /check {result['first_check_ms']:6.1f}ms  "
+              f"first / {result['first_page_ms']:6.1f}ms  prewarm {result['prewarm_ms']:6.1f}ms  "
+              f"process {result['process_ms']:7.1f}ms  (median of {runs})", file=sys.stderr)
+    return results
+
+def check_budget(results, budget):
+    # Budgets are ceilings in milliseconds per mode and measurement. Lazy mode
+    # must also import without running any loader, which no timing noise hides.
+    exceeded = [f"lazy/{name} ran at import" for name in results.get('lazy', {}).get('loaded_at_import', [])]
+    for mode, limits in budget.items():
+        for key, limit in limits.items():
+            value = results.get(mode, {}).get(key)
+            if value is not None and value > limit:
+                exceeded.append(f"{mode}/{key} {value:.1f}ms > {limit:g}ms")
+    return exceeded
+
+# ============================= COMPARE =============================
+def compare(current, baseline, threshold=0.2, p99_threshold=0.5):
+    # A case regresses when throughput drops by more than threshold, or p99
+    # grows by more than p99_threshold (fractions of the baseline). Tails are
+    # noisier than throughput, hence the looser default. A case with no
+    # baseline counts as a regression until the baseline is refreshed;
+    # baseline cases that were not run (e.g. filtered out with -k) are listed.
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            print(f"{name:40} missing from baseline  REGRESSION")
+            regressions.append(name)
+            continue
+        slower = before['ops_per_sec'] and now['ops_per_sec'] < before['ops_per_sec'] * (1 - threshold)
+        tail = before['p99_us'] and now['p99_us'] > before['p99_us'] * (1 + p99_threshold)
+        change = now['ops_per_sec'] / before['ops_per_sec'] - 1 if before['ops_per_sec'] else 0
+        flag = 'REGRESSION' if slower or tail else 'ok'
+        worst = f"  max {before['max_us']:.1f} -> {now['max_us']:.1f}us" if 'max_us' in before else ''
+        print(f"{name:40} {change:+8.1%} ops/s  p99 {before['p99_us']:.1f} -> {now['p99_us']:.1f}us{worst}  {flag}")
+        if slower or tail: regressions.append(name)
+    for name in sorted(set(baseline['results']) - set(current['results'])):
+        print(f"{name:40} not run")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scoring, generation and persistence hot paths.")
+    parser.add_argument('--budget', type=float, default=0.5, help="seconds spent on each case")
+    parser.add_argument('-k', '--only', action='append', help="run only cases whose name contains this (repeatable)")
+    parser.add_argument('-o', '--output', help="write results as JSON (use --save-baseline to refresh the stored one)")
+    parser.add_argument('--save-baseline', action='store_true', help=f"overwrite {os.path.relpath(BASELINE_PATH)}")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed throughput drop before a case is flagged")
+    parser.add_argument('--p99-threshold', type=float, default=0.5, help="allowed p99 growth before a case is flagged")
+    parser.add_argument('--cold-start', action='store_true', help="measure import and first-request time instead")
+    parser.add_argument('--runs', type=int, default=10, help="fresh interpreters per cold-start mode")
+    parser.add_argument('--budget-file', nargs='?', const=COLD_START_BUDGET_PATH,
+                        help="fail if a cold-start median exceeds these limits")
+    args = parser.parse_args(argv)
+
+    if args.cold_start:
+        results = cold_start(args.runs)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+        if args.budget_file:
+            with open(args.budget_file, encoding='utf-8') as f:
+                exceeded = check_budget(results, json.load(f))
+            for line in exceeded:
+                print(f"over budget: {line}")
+            if exceeded: sys.exit(1)
+        return
+
+    result = run(args.budget, args.only)
+    for path in filter(None, [args.output, BASELINE_PATH if args.save_baseline else None]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold, args.p99_threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
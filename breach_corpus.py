@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+
+# A compiled corpus is two files sharing a prefix:
+#   <prefix>.bloom  header + Bloom filter bit array, probed first
+#   <prefix>.sha1   sorted, de-duplicated 20-byte SHA-1 digests, binary
+#                   searched to confirm a Bloom hit
+# Both are memory-mapped read-only, so lookups never pull the corpus onto the
+# heap and forked workers share the same page cache.
+BLOOM_MAGIC = b'SPBLOOM1'
+BLOOM_HEADER = struct.Struct('<8sQIQ')
+DIGEST_SIZE = 20
+HASH_LINE = re.compile(r'^[0-9A-Fa-f]{40}(:\d+)?$')
+
+def password_digest(password):
+    return hashlib.sha1(password.encode('utf-8', 'surrogatepass')).digest()
+
+def bloom_positions(digest, bits, hashes):
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+def bloom_size(count, fp_rate):
+    count = max(count, 1)
+    bits = max(64, math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / count * math.log(2)))
+    return bits, hashes
+
+# ============================= LOOKUP =============================
+class BreachCorpus:
+    def __init__(self, prefix):
+        with open(prefix + '.bloom', 'rb') as f:
+            self._bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes, self.count = BLOOM_HEADER.unpack_from(self._bloom)
+        if magic != BLOOM_MAGIC:
+            raise ValueError(f"{prefix}.bloom is not a breach corpus filter")
+        with open(prefix + '.sha1', 'rb') as f:
+            self._digests = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+        self.size = len(self._digests) // DIGEST_SIZE
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, password):
+        return self.contains_digest(password_digest(password))
+
+    def maybe_contains(self, digest):
+        bloom, offset = self._bloom, BLOOM_HEADER.size
+        for pos in bloom_positions(digest, self.bits, self.hashes):
+            if not bloom[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def contains_digest(self, digest):
+        if not self.maybe_contains(digest):
+            return False
+        data, lo, hi = self._digests, 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * DIGEST_SIZE
+            probe = data[start:start + DIGEST_SIZE]
+            if probe < digest: lo = mid + 1
+            elif probe > digest: hi = mid
+            else: return True
+        return False
+
+    def close(self):
+        self._bloom.close()
+        if self.size: self._digests.close()
+
+# ============================= BUILD =============================
+def line_digest(line):
+    # Accepts plaintext passwords or HIBP-style "SHA1HEX[:count]" lines.
+    if HASH_LINE.match(line):
+        return bytes.fromhex(line[:40])
+    return password_digest(line)
+
+def write_run(digests, directory):
+    digests.sort()
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.run')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(digests))
+    return path
+
+def read_run(path, chunk=DIGEST_SIZE * 65536):
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk)
+            if not block:
+                return
+            for i in range(0, len(block), DIGEST_SIZE):
+                yield block[i:i + DIGEST_SIZE]
+
+def build(lines, prefix, fp_rate=0.001, run_size=2_000_000):
+    # External sort: digests are sorted in bounded runs on disk, then merged,
+    # de-duplicated and streamed into the .sha1 table and the Bloom filter.
+    directory = os.path.dirname(os.path.abspath(prefix))
+    runs, pending, total = [], [], 0
+    try:
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            pending.append(line_digest(line))
+            total += 1
+            if len(pending) >= run_size:
+                runs.append(write_run(pending, directory))
+                pending = []
+        if pending:
+            runs.append(write_run(pending, directory))
+
+        bits, hashes = bloom_size(total, fp_rate)
+        bloom = bytearray(BLOOM_HEADER.size + (bits + 7) // 8)
+        count, last = 0, None
+        with open(prefix + '.sha1', 'wb') as out:
+            for digest in heapq.merge(*(read_run(path) for path in runs)):
+                if digest == last:
+                    continue
+                last = digest
+                out.write(digest)
+                for pos in bloom_positions(digest, bits, hashes):
+                    bloom[BLOOM_HEADER.size + (pos >> 3)] |= 1 << (pos & 7)
+                count += 1
+        BLOOM_HEADER.pack_into(bloom, 0, BLOOM_MAGIC, bits, hashes, count)
+        with open(prefix + '.bloom', 'wb') as out:
+            out.write(bloom)
+        return count
+    finally:
+        for path in runs:
+            os.remove(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a breach list into a memory-mapped lookup corpus.")
+    parser.add_argument('input', nargs='?', default='-', help="plaintext or SHA1[:count] lines, or - for stdin")
+    parser.add_argument('-o', '--output', required=True, help="output prefix (writes .bloom and .sha1)")
+    parser.add_argument('--fp-rate', type=float, default=0.001, help="Bloom filter false-positive rate")
+    parser.add_argument('--run-size', type=int, default=2_000_000, help="digests sorted in memory per run")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', errors='replace', newline='')
+    try:
+        count = build(src, args.output, args.fp_rate, args.run_size)
+    finally:
+        if src is not sys.stdin: src.close()
+    print(f"{count} unique entries -> {args.output}.bloom, {args.output}.sha1")
+
+if __name__ == '__main__':
+    main()
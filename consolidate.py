@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+from storage import init_db
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LEGACY_DATABASES = ['securepass_history.db', 'securepass.db', 'securepass_elite.db', 'securepass_enterprise.db',
+                    'password_history.db', 'passguard.db']
+
+# Streams every legacy database into one file with the schema the app's
+# SQLite store serves (so HISTORY_STORE=sqlite:<output> works on the
+# result), widened with the columns only some apps had and with each row's
+# provenance. Rows move in chunks of --chunk-size, each in one transaction
+# that also advances the source's checkpoint, so an interrupted run resumes
+# where it stopped and never duplicates a row. password is nullable here,
+# unlike in the app's schema, because some legacy tables allowed NULL and
+# every source row is carried over.
+
+# Target column -> source column names it may go by, first match wins.
+CHECK_COLUMNS = {
+    'password': ('password',),
+    'strength': ('strength',),
+    'label': ('label',),
+    'entropy': ('entropy',),
+    'timestamp': ('timestamp', 'checked_at', 'created_at'),
+    'crack_time': ('crack_time',),
+    'breach_count': ('breach_count',),
+    'category': ('category',),
+    'notes': ('notes',)
+}
+FAVORITE_COLUMNS = {'password': ('password',), 'created': ('created', 'timestamp', 'created_at')}
+SETTING_COLUMNS = {'key': ('key',), 'value': ('value',)}
+TIME_COLUMNS = ('timestamp', 'created')
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS sources (
+        id INTEGER PRIMARY KEY,
+        file TEXT NOT NULL,
+        source_table TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        last_rowid INTEGER NOT NULL DEFAULT 0,
+        copied INTEGER NOT NULL DEFAULT 0,
+        finished TEXT,
+        UNIQUE (file, source_table)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS checks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        password TEXT,
+        strength INTEGER,
+        label TEXT,
+        entropy REAL,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+        crack_time TEXT,
+        breach_count INTEGER,
+        category TEXT,
+        notes TEXT,
+        source_id INTEGER REFERENCES sources (id),
+        source_rowid INTEGER
+    )''',
+    '''CREATE TABLE IF NOT EXISTS favorites (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        password TEXT,
+        created TEXT DEFAULT CURRENT_TIMESTAMP,
+        source_id INTEGER REFERENCES sources (id),
+        source_rowid INTEGER
+    )''',
+    '''CREATE TABLE IF NOT EXISTS settings (
+        source_id INTEGER NOT NULL REFERENCES sources (id),
+        key TEXT NOT NULL,
+        value TEXT,
+        source_rowid INTEGER,
+        PRIMARY KEY (source_id, key)
+    )''',
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_checks_source ON checks (source_id, source_rowid)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_favorites_source ON favorites (source_id, source_rowid)",
+]
+
+KINDS = {'checks': CHECK_COLUMNS, 'favorites': FAVORITE_COLUMNS, 'settings': SETTING_COLUMNS}
+
+# ============================= PLANNING =============================
+def open_source(path):
+    # Read-only, so a legacy file is never modified or upgraded by accident.
+    return sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
+
+def classify(name, columns):
+    if name == 'favorites' and 'password' in columns:
+        return 'favorites'
+    if name == 'settings' and {'key', 'value'} <= columns:
+        return 'settings'
+    if 'password' in columns:
+        return 'checks'
+    return None
+
+def plan(paths):
+    # [(path, table, kind, {target column: source column})], plus tables skipped.
+    tables, skipped = [], []
+    for path in paths:
+        conn = open_source(path)
+        try:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+            for name in names:
+                columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')}
+                kind = classify(name, columns)
+                if kind is None:
+                    skipped.append((path, name))
+                    continue
+                mapping = {}
+                for target, candidates in KINDS[kind].items():
+                    found = next((c for c in candidates if c in columns), None)
+                    if found: mapping[target] = found
+                tables.append((os.path.abspath(path), name, kind, mapping))
+        finally:
+            conn.close()
+    return tables, skipped
+
+def normalize_time(value):
+    # Every app wrote UTC "YYYY-MM-DD HH:MM:SS" through CURRENT_TIMESTAMP; also
+    # accept ISO 8601 with a "T", fractions or an offset. Anything else is
+    # kept as it was.
+    if not isinstance(value, str) or (len(value) == 19 and value[10] == ' '):
+        return value
+    try:
+        stamp = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return value
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return stamp.strftime('%Y-%m-%d %H:%M:%S')
+
+def source_select(table, kind, mapping):
+    # Yields (rowid, *values in KINDS[kind] order), NULL for columns the table lacks.
+    columns = ', '.join(f'"{mapping[target]}"' if target in mapping else 'NULL' for target in KINDS[kind])
+    return f'SELECT rowid, {columns} FROM "{table}" WHERE rowid > ? ORDER BY rowid LIMIT ?'
+
+def transform(kind, row):
+    values = list(row[1:])
+    for i, target in enumerate(KINDS[kind]):
+        if target in TIME_COLUMNS: values[i] = normalize_time(values[i])
+    return values
+
+# ============================= COPY =============================
+def open_target(path):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+    conn.close()
+    # Adds the app's indexes, counters and triggers and stamps user_version.
+    init_db(path)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+def source_id(target, path, table, kind):
+    # Sources are keyed by file name, so a run can resume after the files move.
+    with target:
+        target.execute("INSERT OR IGNORE INTO sources (file, source_table, kind) VALUES (?, ?, ?)",
+                       (os.path.basename(path), table, kind))
+    return target.execute("SELECT id, last_rowid, copied FROM sources WHERE file = ? AND source_table = ?",
+                          (os.path.basename(path), table)).fetchone()
+
+def insert_sql(kind):
+    columns = list(KINDS[kind]) + ['source_id', 'source_rowid']
+    verb = 'INSERT OR REPLACE' if kind == 'settings' else 'INSERT OR IGNORE'
+    return f"{verb} INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+def copy_table(target, path, table, kind, mapping, chunk_size):
+    sid, last_rowid, copied = source_id(target, path, table, kind)
+    select = source_select(table, kind, mapping)
+    sql = insert_sql(kind)
+    source = open_source(path)
+    try:
+        while True:
+            rows = source.execute(select, (last_rowid, chunk_size)).fetchall()
+            if not rows:
+                break
+            # One transaction per chunk: the rows and the checkpoint commit together.
+            with target:
+                target.executemany(sql, [transform(kind, row) + [sid, row[0]] for row in rows])
+                last_rowid = rows[-1][0]
+                copied += len(rows)
+                target.execute("UPDATE sources SET last_rowid = ?, copied = ? WHERE id = ?", (last_rowid, copied, sid))
+        with target:
+            target.execute("UPDATE sources SET finished = ? WHERE id = ?",
+                           (datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), sid))
+    finally:
+        source.close()
+    return copied
+
+# ============================= VERIFY =============================
+def digest_rows(rows, digest):
+    digest.update(json.dumps(rows, separators=(',', ':')).encode('utf-8', 'surrogatepass'))
+    digest.update(b'\n')
+
+def verify_table(target, path, table, kind, mapping, chunk_size=10000):
+    # Row counts and a BLAKE2b checksum over every migrated value, in source
+    # rowid order, computed independently from the source and the target. Both
+    # sides are read in chunks of the same size, so equal data hashes equally.
+    sid = target.execute("SELECT id FROM sources WHERE file = ? AND source_table = ?",
+                         (os.path.basename(path), table)).fetchone()
+    if sid is None:
+        return {'source_rows': None, 'target_rows': 0, 'ok': False}
+    sid = sid[0]
+    source = open_source(path)
+    try:
+        select = source_select(table, kind, mapping)
+        source_sum, target_sum = hashlib.blake2b(digest_size=16), hashlib.blake2b(digest_size=16)
+        source_rows = target_rows = 0
+        last = 0
+        while True:
+            rows = source.execute(select, (last, chunk_size)).fetchall()
+            if not rows: break
+            digest_rows([[row[0]] + transform(kind, row) for row in rows], source_sum)
+            source_rows += len(rows)
+            last = rows[-1][0]
+        migrated = f"SELECT source_rowid, {', '.join(KINDS[kind])} FROM {kind} WHERE source_id = ? AND source_rowid > ? " \
+                 f"ORDER BY source_rowid LIMIT ?"
+        last = 0
+        while True:
+            rows = target.execute(migrated, (sid, last, chunk_size)).fetchall()
+            if not rows: break
+            digest_rows(rows, target_sum)
+            target_rows += len(rows)
+            last = rows[-1][0]
+    finally:
+        source.close()
+    return {'source_rows': source_rows, 'target_rows': target_rows,
+            'checksum': source_sum.hexdigest(), 'ok': source_rows == target_rows and
+            source_sum.digest() == target_sum.digest()}
+
+# ============================= CLI =============================
+def consolidate(paths, output, chunk_size=5000, verify_only=False):
+    tables, skipped = plan(paths)
+    for path, name in skipped:
+        print(f"skipping {os.path.basename(path)}:{name} (no password column)", file=sys.stderr)
+    target = open_target(output)
+    report = {}
+    try:
+        if not verify_only:
+            for path, table, kind, mapping in tables:
+                start = time.perf_counter()
+                copied = copy_table(target, path, table, kind, mapping, chunk_size)
+                print(f"{os.path.basename(path) + ':' + table:40} -> {kind:9} {copied:>12,} rows  "
+                      f"{time.perf_counter() - start:7.2f}s", file=sys.stderr)
+        for path, table, kind, mapping in tables:
+            result = verify_table(target, path, table, kind, mapping)
+            report[f'{os.path.basename(path)}:{table}'] = dict(result, kind=kind)
+            print(f"verify {os.path.basename(path) + ':' + table:40} source {result['source_rows']} target "
+                  f"{result['target_rows']}  {'ok' if result['ok'] else 'MISMATCH'}")
+    finally:
+        target.close()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the legacy SecurePass databases into one verified database.")
+    parser.add_argument('inputs', nargs='*', help="source databases (default: the six legacy files in the repo)")
+    parser.add_argument('-o', '--output', required=True, help="consolidated database; rerun to resume")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per transaction")
+    parser.add_argument('--verify-only', action='store_true', help="only compare counts and checksums")
+    parser.add_argument('--report', help="write the verification report as JSON")
+    args = parser.parse_args(argv)
+
+    inputs = args.inputs or [p for p in (os.path.join(ROOT, name) for name in LEGACY_DATABASES) if os.path.exists(p)]
+    if os.path.abspath(args.output) in map(os.path.abspath, inputs):
+        parser.error("the output must not be one of the inputs")
+    if len({os.path.basename(p) for p in inputs}) < len(inputs):
+        parser.error("input file names must be unique")
+    report = consolidate(inputs, args.output, args.chunk_size, args.verify_only)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if not all(result['ok'] for result in report.values()):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,468 @@
+import math
+import os
+import random
+import re
+import time
+from datetime import date
+from functools import lru_cache
+
+from pattern_matcher import AhoCorasick
+
+# zxcvbn-style guess estimation: find every dictionary, keyboard, repeat,
+# sequence and date match, then pick the decomposition of the password into
+# matches and bruteforce gaps that needs the fewest guesses overall.
+
+# Roughly frequency-ordered; a line's position is its rank. Set
+# ESTIMATOR_WORDLIST to a newline-delimited file to use a larger list.
+RANKED_WORDS = """
+123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon
+123123 baseball abc123 football monkey letmein 696969 shadow master 666666
+qwertyuiop 123321 mustang 1234567890 michael 654321 superman 1qaz2wsx 7777777 121212
+000000 qazwsx 123qwe killer trustno1 jordan jennifer zxcvbnm asdfgh hunter
+buster soccer harley batman andrew tigger sunshine iloveyou charlie robert
+thomas hockey ranger daniel starwars klaster 112233 george computer michelle
+jessica pepper 1111 zxcvbn 555555 11111111 131313 freedom 777777 pass
+maggie 159753 aaaaaa ginger princess joshua cheese amanda summer love
+ashley nicole chelsea biteme matthew access yankees 987654321 dallas austin
+thunder taylor matrix welcome admin login secret hello guest qwe abc
+""".split()
+
+UNLEET = str.maketrans({'4': 'a', '@': 'a', '8': 'b', '(': 'c', '3': 'e', '6': 'g', '9': 'g',
+                        '1': 'i', '!': 'i', '|': 'l', '0': 'o', '$': 's', '5': 's', '7': 't', '+': 't', '2': 'z'})
+
+KEYBOARD = [
+    ("`1234567890-=", "~!@#$%^&*()_+"),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+    ("asdfghjkl;'", 'ASDFGHJKL:"'),
+    ("zxcvbnm,./", "ZXCVBNM<>?"),
+]
+
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MAX_SEQUENCE_MATCHES = 20
+MAX_LENGTH = 100
+MAX_SEQUENCE_DELTA = 5
+REFERENCE_YEAR = date.today().year
+MIN_YEAR_SPACE = 20
+INF = float('inf')
+LOG10_MIN_GROWTH = math.log10(MIN_GUESSES_BEFORE_GROWING_SEQUENCE)
+LOG10_DAYS = math.log10(365)
+LOG10_MIN_SINGLE = math.log10(MIN_SUBMATCH_GUESSES_SINGLE_CHAR)
+LOG10_MIN_MULTI = math.log10(MIN_SUBMATCH_GUESSES_MULTI_CHAR)
+
+def load_ranked_words():
+    path = os.environ.get('ESTIMATOR_WORDLIST')
+    if not path:
+        return RANKED_WORDS
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+RANKS = {}
+for rank, word in enumerate(load_ranked_words(), 1):
+    RANKS.setdefault(word, rank)
+DICTIONARY = AhoCorasick.build(RANKS)
+
+def build_keyboard():
+    position, keys = {}, []
+    for row, (plain, shifted) in enumerate(KEYBOARD):
+        for col, ch in enumerate(plain):
+            keys.append((row, col))
+            position[ch] = (row, col, False)
+            position[shifted[col]] = (row, col, True)
+    # Rows are slanted: a key touches its row neighbours, the two keys above
+    # it at (col, col + 1) and the two below at (col - 1, col).
+    occupied = set(keys)
+    neighbours = {}
+    for row, col in keys:
+        around = [(row, col - 1), (row, col + 1), (row - 1, col), (row - 1, col + 1),
+                  (row + 1, col - 1), (row + 1, col)]
+        neighbours[(row, col)] = [k for k in around if k in occupied]
+    degree = sum(len(v) for v in neighbours.values()) / len(neighbours)
+    return position, neighbours, len(keys), degree
+
+KEY_POSITION, KEY_NEIGHBOURS, KEY_COUNT, KEY_DEGREE = build_keyboard()
+
+def build_key_steps():
+    # Every two-character string typed on neighbouring keys, mapped to the
+    # direction of the step and whether the second key is shifted.
+    at = {}
+    for ch, (row, col, shifted) in KEY_POSITION.items():
+        at.setdefault((row, col), []).append((ch, shifted))
+    steps = {}
+    for ch, (row, col, _) in KEY_POSITION.items():
+        for key in KEY_NEIGHBOURS[(row, col)]:
+            for other, shifted in at[key]:
+                steps[ch + other] = ((key[0] - row, key[1] - col), shifted)
+    return steps
+
+KEY_STEPS = build_key_steps()
+
+# ============================= MATCHERS =============================
+def log10_nck(n, k):
+    if k < 0 or k > n:
+        return float('-inf')
+    return (math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)) / math.log(10)
+
+def log10_sum(a, b):
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log10(1 + 10 ** (lo - hi))
+
+def uppercase_log10(token):
+    if token == token.lower():
+        return 0.0
+    upper = sum(1 for ch in token if ch.isupper())
+    lower = sum(1 for ch in token if ch.islower())
+    if not upper:
+        return 0.0
+    if not lower or (upper == 1 and (token[0].isupper() or token[-1].isupper())):
+        return math.log10(2)
+    total = float('-inf')
+    for i in range(1, min(upper, lower) + 1):
+        total = log10_sum(total, log10_nck(upper + lower, i)) if total != float('-inf') else log10_nck(upper + lower, i)
+    return total
+
+def dictionary_matches(password, lowered):
+    matches = []
+    for start, end, word in DICTIONARY.iter_matches(lowered):
+        token = password[start:end]
+        guesses = math.log10(RANKS[word]) + uppercase_log10(token)
+        matches.append((start, end - 1, guesses, 'dictionary', token))
+    n = len(lowered)
+    for start, end, word in DICTIONARY.iter_matches(lowered[::-1]):
+        if len(word) < 3 or word == word[::-1]:
+            continue
+        i, j = n - end, n - start - 1
+        token = password[i:j + 1]
+        guesses = math.log10(RANKS[word]) + uppercase_log10(token) + math.log10(2)
+        matches.append((i, j, guesses, 'reversed', token))
+    unleeted = lowered.translate(UNLEET)
+    if unleeted != lowered:
+        for start, end, word in DICTIONARY.iter_matches(unleeted):
+            subs = sum(1 for a, b in zip(lowered[start:end], word) if a != b)
+            if not subs:
+                continue
+            token = password[start:end]
+            guesses = math.log10(RANKS[word]) + uppercase_log10(token) + subs * math.log10(2)
+            matches.append((start, end - 1, guesses, 'l33t', token))
+    return matches
+
+@lru_cache(maxsize=1024)
+def spatial_log10(length, turns, shifted):
+    guesses = 0.0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns, i - 1) + 1):
+            guesses += math.comb(i - 1, j - 1) * KEY_COUNT * KEY_DEGREE ** j
+    result = math.log10(max(guesses, 1))
+    if shifted:
+        unshifted = length - shifted
+        if not unshifted:
+            result += math.log10(2)
+        else:
+            result += math.log10(sum(math.comb(length, i) for i in range(1, min(shifted, unshifted) + 1)))
+    return result
+
+def spatial_matches(password):
+    matches = []
+    n, i = len(password), 0
+    while i < n - 2:
+        j, turns, direction = i, 0, None
+        shifted = 1 if KEY_POSITION.get(password[i], (0, 0, False))[2] else 0
+        while j + 1 < n:
+            step = KEY_STEPS.get(password[j:j + 2])
+            if step is None:
+                break
+            if step[0] != direction:
+                turns += 1
+                direction = step[0]
+            shifted += step[1]
+            j += 1
+        if j - i >= 2:
+            matches.append((i, j, spatial_log10(j - i + 1, turns, shifted), 'spatial', password[i:j + 1]))
+        i = max(j, i + 1)
+    return matches
+
+GREEDY_REPEAT = re.compile(r'(.+)\1+', re.S)
+LAZY_REPEAT = re.compile(r'(.+?)\1+', re.S)
+LAZY_ANCHORED = re.compile(r'^(.+?)\1+$', re.S)
+
+def repeat_matches(password, depth):
+    matches = []
+    pos = 0
+    while pos < len(password):
+        # Both patterns first succeed at the same position, so only one
+        # of them has to scan for it.
+        lazy = LAZY_REPEAT.search(password, pos)
+        if not lazy:
+            break
+        greedy = GREEDY_REPEAT.match(password, lazy.start())
+        if len(greedy.group(0)) > len(lazy.group(0)):
+            match, base = greedy, LAZY_ANCHORED.match(greedy.group(0)).group(1)
+        else:
+            match, base = lazy, lazy.group(1)
+        i, j = match.start(), match.end() - 1
+        base_guesses = base_guesses_log10(base) if depth < 1 else float(len(base))
+        repeats = len(match.group(0)) // len(base)
+        matches.append((i, j, base_guesses + math.log10(repeats), 'repeat', match.group(0)))
+        pos = j + 1
+    return matches
+
+def sequence_matches(password):
+    matches = []
+    n = len(password)
+    i = 0
+    while i < n - 2:
+        delta = ord(password[i + 1]) - ord(password[i])
+        j = i + 1
+        if 0 < abs(delta) <= MAX_SEQUENCE_DELTA:
+            while j + 1 < n and ord(password[j + 1]) - ord(password[j]) == delta:
+                j += 1
+        if j - i >= 2:
+            token = password[i:j + 1]
+            first = token[0]
+            if first in 'aAzZ019': base = 4
+            elif first.isdigit(): base = 10
+            else: base = 26
+            guesses = math.log10(base * len(token) * (2 if delta < 0 else 1))
+            matches.append((i, j, guesses, 'sequence', token))
+            i = j
+        else:
+            i += 1
+    return matches
+
+YEAR = re.compile(r'(?=(19\d\d|20\d\d))')
+DIGIT_RUN = re.compile(r'\d{6,}')
+SEPARATED_DATE = re.compile(r'(?=((\d{1,4})([\s/\\_.-])(\d{1,2})\3(\d{1,4})))')
+
+def year_log10(year):
+    return math.log10(max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE))
+
+def day_month(a, b):
+    return (1 <= a <= 31 and 1 <= b <= 12) or (1 <= b <= 31 and 1 <= a <= 12)
+
+def full_year(year):
+    if year < 100:
+        year += 2000 if year < 50 else 1900
+    return year if 1000 <= year <= 2050 else None
+
+def valid_date(first, middle, last):
+    # Accepts d-m-y, m-d-y, y-m-d and y-d-m orderings.
+    year = full_year(last)
+    if year is not None and day_month(first, middle):
+        return year
+    year = full_year(first)
+    if year is not None and day_month(middle, last):
+        return year
+    return None
+
+def date_matches(password):
+    matches = []
+    for m in YEAR.finditer(password):
+        matches.append((m.start(), m.start() + 3, year_log10(int(m.group(1))), 'date', m.group(1)))
+    for m in SEPARATED_DATE.finditer(password):
+        token, a, _, b, c = m.groups()
+        year = valid_date(int(a), int(b), int(c))
+        if year is not None:
+            i = m.start()
+            matches.append((i, i + len(token) - 1, math.log10(365 * 4) + year_log10(year), 'date', token))
+    # Unseparated ddmmyy / ddmmyyyy / yyyymmdd style dates inside digit runs.
+    # Every window shares its pieces with its neighbours, so these are
+    # worked out once per run: pair[i] is the two-digit number at digit i,
+    # year2[i] its two-digit year, dm[i] whether pair[i], pair[i + 2] is a
+    # day and month and year4[i] the four-digit year at digit i, if valid.
+    for run in DIGIT_RUN.finditer(password):
+        digits, offset = run.group(0), run.start()
+        pair = [int(digits[i:i + 2]) for i in range(len(digits) - 1)]
+        year2 = [full_year(p) for p in pair]
+        dm = [day_month(pair[i], pair[i + 2]) for i in range(len(pair) - 2)]
+        year4 = [full_year(pair[i] * 100 + pair[i + 2]) for i in range(len(pair) - 2)]
+        for i in range(len(digits) - 5):
+            # valid_date(pair[i], pair[i + 2], pair[i + 4]); a two-digit year is always valid.
+            year = year2[i + 4] if dm[i] else year2[i] if dm[i + 2] else None
+            if year is not None:
+                matches.append((offset + i, offset + i + 5, LOG10_DAYS + year_log10(year), 'date', digits[i:i + 6]))
+            if i + 8 > len(digits):
+                continue
+            year = year4[i + 4]
+            if year is None or not dm[i]:
+                year = year4[i]
+                if year is not None and not dm[i + 4]:
+                    year = None
+            if year is not None:
+                matches.append((offset + i, offset + i + 7, LOG10_DAYS + year_log10(year), 'date', digits[i:i + 8]))
+    return matches
+
+# ============================= SEARCH =============================
+def pareto(states):
+    # A state using more matches is only worth keeping if it is cheaper than
+    # every state using fewer: the final score grows with both l and cost.
+    if len(states) < 2:
+        return states
+    kept, floor = {}, INF
+    for l in sorted(states):
+        if states[l] < floor:
+            kept[l] = floor = states[l]
+    return kept
+
+def path_score(cost, l):
+    return log10_sum(math.lgamma(l + 1) / math.log(10) + cost, LOG10_MIN_GROWTH * (l - 1))
+
+def cheapest_path_score(n, by_end):
+    # Score of the cheapest decomposition when the number of pieces is
+    # ignored, found in one pass. It is a real path, so the optimum is never
+    # above it. Costs are summed in the same order as in estimate.
+    matched, either = [(0.0, 0)] + [None] * n, [(0.0, 0)] + [None] * n
+    run = None
+    for k in range(n):
+        if matched[k] is not None:
+            cost, l = matched[k]
+            if run is None or (cost - k, l + 1) < run: run = (cost - k, l + 1)
+        best = None
+        for i, _, guesses, *_ in by_end[k]:
+            cost, l = either[i]
+            if best is None or (cost + guesses, l + 1) < best: best = (cost + guesses, l + 1)
+        matched[k + 1] = best
+        brute = (run[0] + k + 1, run[1])
+        either[k + 1] = min(best, brute) if best else brute
+    return path_score(*either[n])
+
+def estimate(password, depth=0):
+    # Like zxcvbn, only the first MAX_LENGTH characters are scored: matching
+    # grows quadratically with length, and by then any password is far past
+    # the strongest band.
+    password = password[:MAX_LENGTH]
+    n = len(password)
+    if not n:
+        return {'guesses_log10': 0.0, 'sequence': []}
+    lowered = password.lower()
+    # Only the cheapest match per span can be on the optimal path.
+    spans = {}
+    for match in (dictionary_matches(password, lowered) + spatial_matches(password)
+                  + repeat_matches(password, depth) + sequence_matches(password) + date_matches(password)):
+        i, j, guesses = match[0], match[1], match[2]
+        if i == 0 and j == n - 1: floor = 0.0
+        elif i == j: floor = LOG10_MIN_SINGLE
+        else: floor = LOG10_MIN_MULTI
+        match = (i, j, max(guesses, floor)) + match[3:]
+        if (i, j) not in spans or match[2] < spans[(i, j)][2]:
+            spans[(i, j)] = match
+    by_end = [[] for _ in range(n)]
+    for match in spans.values():
+        by_end[match[1]].append(match)
+
+    # State (k, l): best log10 product of guesses for password[:k + 1] split
+    # into l matches. best[k] holds paths whose last piece is a real match; a
+    # path ending in a bruteforce run i..k costs (k - i + 1) in log10 on top of
+    # a match-ending path at i - 1, so the cheapest start for every l is a
+    # running minimum (run_at[k]) and bruteforce states are only materialized
+    # where a match starts or at the end. States are sparse {l: cost} dicts,
+    # so most passwords only touch a handful of l values. The winning path is
+    # recovered afterwards by recomputing the same sums. Dominated states are
+    # dropped as they are produced (see pareto).
+    # Paths only get costlier as they grow, and the final score exceeds
+    # both log10(l!) + cost and 4(l - 1). So once either passes the score
+    # of some known path (limit), the state can never win and is dropped.
+    # A dropped state only ever dominates states that would be dropped too,
+    # so what is kept is exactly what the full search keeps below limit.
+    # 4(l - 1) > limit also caps l.
+    limit = cheapest_path_score(n, by_end)
+    width = min(n, n // 4 + 1, MAX_SEQUENCE_MATCHES, int(limit // LOG10_MIN_GROWTH) + 1) + 1
+    log10_factorial = [math.lgamma(l + 1) / math.log(10) for l in range(width + 1)]
+    start = {0: 0.0}
+    best, run_at, either = [], [], {-1: start}
+    run_min = {}
+
+    def bounded(states):
+        return {l: cost for l, cost in pareto(states).items() if log10_factorial[l] + cost <= limit}
+
+    def ending_at(k):
+        # Cheapest path of each length covering password[:k + 1].
+        if k not in either:
+            merged = {l: r + k + 1 for l, r in run_at[k].items()}
+            for l, cost in best[k].items():
+                if cost <= merged.get(l, INF):
+                    merged[l] = cost
+            either[k] = bounded(merged)
+        return either[k]
+
+    for k in range(n):
+        before = best[k - 1] if k else start
+        if before:
+            run_min = dict(run_min)
+            for l, cost in before.items():
+                if l + 1 < width and cost - k < run_min.get(l + 1, INF):
+                    run_min[l + 1] = cost - k
+            run_min = {l: r for l, r in pareto(run_min).items() if log10_factorial[l] + r + k + 1 <= limit}
+        run_at.append(run_min)
+        row = {}
+        for match in by_end[k]:
+            i, guesses = match[0], match[2]
+            if guesses > limit: continue
+            for l, cost in ending_at(i - 1).items():
+                if l + 1 < width and cost + guesses < row.get(l + 1, INF):
+                    row[l + 1] = cost + guesses
+        best.append(bounded(row) if row else row)
+
+    total, end_l = INF, 0
+    for l, cost in ending_at(n - 1).items():
+        guesses = path_score(cost, l)
+        if guesses < total:
+            total, end_l = guesses, l
+
+    sequence = []
+    k, l = n - 1, end_l
+    while k >= 0 and l > 0:
+        if best[k].get(l, INF) <= run_at[k].get(l, INF) + k + 1:
+            for i, j, guesses, pattern, token in by_end[k]:
+                if ending_at(i - 1).get(l - 1, INF) + guesses == best[k][l]:
+                    break
+            sequence.append({'pattern': pattern, 'token': token, 'i': i, 'j': j, 'guesses_log10': round(guesses, 3)})
+        else:
+            i = next(i for i in range(k + 1) if (best[i - 1] if i else start).get(l - 1, INF) - i == run_at[k][l])
+            sequence.append({'pattern': 'bruteforce', 'token': password[i:k + 1], 'i': i, 'j': k,
+                             'guesses_log10': round(float(k - i + 1), 3)})
+        k, l = i - 1, l - 1
+    sequence.reverse()
+    return {'guesses_log10': round(total, 3), 'sequence': sequence}
+
+@lru_cache(maxsize=1024)
+def base_guesses_log10(base):
+    return estimate(base, 1)['guesses_log10']
+
+def guesses_log10(password):
+    return estimate(password)['guesses_log10']
+
+# ============================= BENCHMARK =============================
+def worst_case_inputs(length=64):
+    rnd = random.Random(13)
+    printable = [chr(c) for c in range(33, 127)]
+    cases = {
+        'random': ''.join(rnd.choice(printable) for _ in range(length)),
+        'repeat_char': 'a' * length,
+        'repeat_block': ('abc' * length)[:length],
+        'keyboard_walk': ('qwertyuiopasdfghjkl' * 4)[:length],
+        'sequence': ''.join(chr(97 + i % 26) for i in range(length)),
+        'digits': ''.join(rnd.choice('0123456789') for _ in range(length)),
+        'dates': ('19901231' * 8)[:length],
+        'dictionary': ('password' * 8)[:length],
+        'leet_mixed': ('P@ssw0rd1qaz2wsx' * 4)[:length],
+    }
+    return cases
+
+def benchmark(rounds=200):
+    results = {}
+    for name, password in worst_case_inputs().items():
+        timings = []
+        for _ in range(rounds):
+            base_guesses_log10.cache_clear()
+            start = time.perf_counter()
+            estimate(password)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[name] = {'p50_ms': timings[len(timings) // 2] * 1000, 'max_ms': timings[-1] * 1000,
+                         'p99_ms': timings[int(len(timings) * 0.99) - 1] * 1000}
+    return results
+
+if __name__ == '__main__':
+    for case, stats in benchmark().items():
+        print(f"{case:14} p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms  max {stats['max_ms']:.3f} ms")
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REQUEST_TIMEOUT = 10.0
+
+# Keystroke-style load: many concurrent clients, each sending a small
+# POST /check after an exponentially distributed pause (the UI debounces at
+# 800ms). The same load is replayed against the threaded Flask server and the
+# ASGI app under uvicorn at increasing connection counts; a mode's capacity
+# is the most clients it serves with p99 inside the budget and no errors.
+
+# ============================= SERVERS =============================
+def serve_flask(port):
+    from werkzeug.serving import run_simple
+    import main
+    run_simple('127.0.0.1', port, main.app, threaded=True)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(mode, port, workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    if mode == 'asgi':
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning',
+               '--no-access-log', '--backlog', '4096']
+    else:
+        cmd = [sys.executable, os.path.join(ROOT, 'loadtest.py'), 'serve', '--port', str(port)]
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+# ============================= CLIENT =============================
+async def connection(port, passwords, think, stop_at, latencies, errors):
+    # One simulated client. It reconnects whenever the server answers with
+    # "Connection: close" (the Werkzeug server always does), and that
+    # reconnect counts toward the request's latency, as it would in a browser.
+    reader = writer = None
+    try:
+        while True:
+            await asyncio.sleep(random.expovariate(1 / think))
+            if time.monotonic() >= stop_at:
+                return
+            body = json.dumps({'password': random.choice(passwords)}).encode()
+            request = (b'POST /check HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                       b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+            start = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), REQUEST_TIMEOUT)
+            writer.write(request)
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+            fields = dict(line.lower().split(b':', 1) for line in head.split(b'\r\n')[1:] if b':' in line)
+            await asyncio.wait_for(reader.readexactly(int(fields[b'content-length'])), REQUEST_TIMEOUT)
+            if fields.get(b'connection', b'').strip() == b'close':
+                writer.close()
+                writer = None
+            if not head.startswith(b'HTTP/1.1 200'):
+                errors.append(head.split(b'\r\n', 1)[0].decode())
+                continue
+            latencies.append(time.perf_counter() - start)
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, KeyError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        if writer is not None: writer.close()
+
+async def run_level(port, clients, duration, think, passwords):
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    tasks = []
+    for _ in range(clients):
+        tasks.append(asyncio.create_task(connection(port, passwords, think, stop_at, latencies, errors)))
+        await asyncio.sleep(0.001)  # ramp instead of a SYN flood
+    await asyncio.gather(*tasks)
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 2) if latencies else None
+    return {'clients': clients, 'requests': len(latencies), 'rps': round(len(latencies) / duration, 1),
+            'p50_ms': pick(0.5), 'p99_ms': pick(0.99), 'errors': len(errors)}
+
+def load_test(modes, levels, duration, think, budget_ms):
+    rnd = random.Random(3)
+    passwords = [''.join(rnd.choice('abcdefghijkLMNOP0123456789!@#') for _ in range(rnd.randint(6, 20)))
+                 for _ in range(5000)]
+    report = {}
+    for mode in modes:
+        workdir = tempfile.mkdtemp(prefix=f'loadtest-{mode}-')
+        port = free_port()
+        proc = start_server(mode, port, workdir)
+        try:
+            rows = []
+            for level in levels:
+                row = asyncio.run(run_level(port, level, duration, think, passwords))
+                rows.append(row)
+                print(f"{mode:5} {level:6} clients  {row['rps']:8.1f} req/s  p50 {row['p50_ms']}ms  "
+                      f"p99 {row['p99_ms']}ms  errors {row['errors']}", file=sys.stderr)
+            ok = [r['clients'] for r in rows
+                  if not r['errors'] and r['p99_ms'] is not None and r['p99_ms'] <= budget_ms]
+            report[mode] = {'levels': rows, 'capacity': max(ok) if ok else 0}
+        finally:
+            proc.terminate()
+            proc.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare concurrent-client capacity of the Flask and ASGI servers.")
+    sub = parser.add_subparsers(dest='command')
+    serve = sub.add_parser('serve', help=argparse.SUPPRESS)
+    serve.add_argument('--port', type=int, required=True)
+    parser.add_argument('--modes', default='flask,asgi')
+    parser.add_argument('--levels', default='50,100,200,400,800', help="concurrent client counts to try")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per level")
+    parser.add_argument('--think-ms', type=float, default=800.0, help="mean pause between a connection's requests")
+    parser.add_argument('--p99-budget-ms', type=float, default=50.0)
+    parser.add_argument('-o', '--output', help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        return serve_flask(args.port)
+    report = load_test(args.modes.split(','), [int(n) for n in args.levels.split(',')],
+                       args.duration, args.think_ms / 1000, args.p99_budget_ms)
+    for mode, result in report.items():
+        print(f"{mode}: {result['capacity']} clients within p99 {args.p99_budget_ms:g}ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -1,141 +1,921 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+import atexit
+import gzip
+import hashlib
 import math
+import os
+import queue
 import re
 import secrets
+import signal
 import string
+import threading
+import time
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timezone
 import json
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, wraps
+
+from breach_corpus import BreachCorpus
+from metrics import Registry, timed
+from pattern_matcher import AhoCorasick, load_automaton
+from profiler import SamplingProfiler
+from storage import open_store
+from wordlist import WordList
 
 app = Flask(__name__)
 
+# ============================= METRICS =============================
+# Set METRICS_DIR to a directory every worker can write (tmpfs is ideal) so
+# /metrics sums all processes rather than only the one that answered.
+metrics = Registry(os.environ.get('METRICS_DIR'))
+STAGE_HELP = 'Time spent in internal stages of request handling.'
+stage_timers = {stage: metrics.histogram('securepass_stage_duration_seconds', STAGE_HELP, stage=stage)
+                for stage in ('score', 'estimate', 'db_write', 'db_read')}
+# Write-behind backlog: rows queued for the history writer and rows it dropped
+# because the queue stayed full (since each worker started).
+writer_gauges = {
+    'depth': metrics.gauge('securepass_history_queue_depth', 'Check history rows waiting to be written.'),
+    'dropped': metrics.gauge('securepass_history_dropped_rows', 'Check history rows dropped on a full queue.')
+}
+
+# ============================= PROFILER =============================
+# Off unless started from POST /admin/profile (needs ADMIN_TOKEN) or, when
+# PROFILE_SIGNAL names a signal such as SIGUSR2, by sending it to a worker.
+# add_checks, history_page and favorites_page match whichever storage backend is open.
+PROFILE_FOCUS = ('calculate_strength', 'analyze_password', 'calculate_entropy', 'write_checks', 'add_checks',
+                 'get_history_page', 'history_page', 'get_favorites_page', 'favorites_page', 'get_counts',
+                 'save_favorite')
+profiler = SamplingProfiler(PROFILE_FOCUS, os.environ.get('PROFILE_DIR'), threads=('history-writer',))
+
+def profile_on_signal(*_):
+    # The handler runs on whatever the main thread was doing, possibly inside
+    # the profiler's own lock, so it only hands the start to a new thread.
+    args = (float(os.environ.get('PROFILE_SECONDS', 30)), float(os.environ.get('PROFILE_FRACTION', 0.1)))
+    threading.Thread(target=profiler.start, args=args, name='profile-signal', daemon=True).start()
+
+if os.environ.get('PROFILE_SIGNAL'):
+    signal.signal(getattr(signal, os.environ['PROFILE_SIGNAL']), profile_on_signal)
+
+# ============================= STARTUP =============================
+# Nothing heavy runs at import: the database schema, the page template and
+# the scoring assets each load on first use, so a serverless cold start only
+# pays for what its first request touches. Long-lived servers call prewarm()
+# (or set PREWARM=1) to load everything before taking traffic; a pre-fork
+# parent must, so workers share one copy.
+LAZY_LOADERS = []
+
+def lazy(fn):
+    # Runs a zero-argument loader once and returns its result on every call.
+    # Concurrent first callers wait for that single load.
+    lock = threading.Lock()
+    loaded = []
+
+    @wraps(fn)
+    def load():
+        if not loaded:
+            with lock:
+                if not loaded: loaded.append(fn())
+        return loaded[0]
+    load.loaded = lambda: bool(loaded)
+    LAZY_LOADERS.append(load)
+    return load
+
+def prewarm():
+    # Returns seconds spent per loader; ones already loaded cost nothing.
+    timings = {}
+    for load in LAZY_LOADERS:
+        start = time.perf_counter()
+        load()
+        timings[load.__name__] = round(time.perf_counter() - start, 6)
+    return timings
+
 # ============================= DATABASE =============================
-def init_db():
-    conn = sqlite3.connect('securepass_history.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS checks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            password TEXT NOT NULL,
-            strength INTEGER,
-            label TEXT,
-            entropy REAL,
-            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS favorites (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            password TEXT NOT NULL,
-            created TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# HISTORY_STORE picks where checks and favorites live (see storage.py):
+# "sqlite:<path>" (the default), "hashed:<path>" to keep only keyed digests
+# (HISTORY_KEY, 32 hex-encoded bytes), "memory[:<capacity>]" for a zero-I/O
+# ring buffer, or "log:<path>" for an append-only file such as /tmp on Vercel.
+# HISTORY_SEEN_INDEX=1 indexes plaintext passwords for fast seen-lookups.
+@lazy
+def load_history_store():
+    key = os.environ.get('HISTORY_KEY')
+    return open_store(os.environ.get('HISTORY_STORE'), bytes.fromhex(key) if key else None,
+                      seen_index=os.environ.get('HISTORY_SEEN_INDEX') == '1')
+
+@timed(stage_timers['db_write'])
+def write_checks(rows):
+    load_history_store().add_checks(rows)
+
+class HistoryWriter:
+    # Write-behind buffer for check history. Requests only enqueue a row; a
+    # background thread inserts rows in batches once batch_size rows are
+    # waiting or flush_interval seconds have passed. The queue is bounded, so
+    # a stalled disk slows submitters for at most put_timeout before rows
+    # are dropped and counted. flush and close give up after wait_timeout.
+    # `gauges` ({'depth': ..., 'dropped': ...}) are kept current for /metrics:
+    # exactly on drops and written batches, at most every 0.1s on submits.
+    def __init__(self, batch_size=200, flush_interval=0.5, max_pending=10000, put_timeout=1.0, wait_timeout=10.0,
+                 gauges=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.wait_timeout = wait_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.stalls = 0
+        self.gauges = gauges or {}
+        self._next_publish = 0.0
+
+    def _ensure_started(self):
+        # Also restarts a writer thread that died, so rows never queue up
+        # behind nobody.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock: self.dropped += 1
+            self._publish(force=True)
+            return
+        self._publish()
+
+    def try_submit(self, row):
+        # Never blocks, for callers on an event loop; False means the queue is full.
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            return False
+        self._publish()
+        return True
+
+    def flush(self):
+        # True once every row queued before the call is written; False if the
+        # writer did not get there within wait_timeout.
+        if self._thread is None:
+            return True
+        self._ensure_started()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=self.wait_timeout)
+            if done.wait(self.wait_timeout): return True
+        except queue.Full:
+            pass
+        with self._lock: self.stalls += 1
+        app.logger.error("history writer did not flush within %.1fs (%d rows queued)", self.wait_timeout, self.depth())
+        return False
 
-init_db()
+    def close(self):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(None, timeout=self.wait_timeout)
+        except queue.Full:
+            pass
+        self._thread.join(self.wait_timeout)
+        if self._thread.is_alive():
+            app.logger.error("history writer still busy after %.1fs; %d rows not written", self.wait_timeout, self.depth())
+        self._thread = None
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {'depth': self.depth(), 'written': self.written, 'dropped': self.dropped, 'failed': self.failed,
+                'stalls': self.stalls}
+
+    def _publish(self, force=False):
+        if not self.gauges: return
+        now = time.monotonic()
+        if now < self._next_publish and not force: return
+        self._next_publish = now + 0.1
+        self.gauges['depth'].set(self.depth())
+        self.gauges['dropped'].set(self.dropped)
+
+    def _run(self):
+        batch = []
+        deadline = 0
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                item = ()
+            if isinstance(item, tuple) and item:
+                if not batch: deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size: continue
+            if batch:
+                self._write(batch)
+                batch = []
+                self._publish(force=True)
+            if isinstance(item, threading.Event): item.set()
+            elif item is None: return
+
+    def _write(self, batch):
+        try:
+            write_checks(batch)
+            self.written += len(batch)
+        except (sqlite3.Error, OSError):
+            self.failed += len(batch)
+            app.logger.exception("failed to write %d history rows", len(batch))
+
+history_writer = HistoryWriter(gauges=writer_gauges)
+atexit.register(history_writer.close)
 
 def save_check(password, strength, label, entropy):
-    conn = sqlite3.connect('securepass_history.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO checks (password, strength, label, entropy) VALUES (?, ?, ?, ?)",
-              (password, strength, label, entropy))
-    conn.commit()
-    conn.close()
+    history_writer.submit((password, strength, label, entropy))
+
+MAX_PAGE_SIZE = 500
+
+def parse_cursor(value):
+    # Cursors are "<timestamp>,<id>" of the last row on the previous page.
+    if not value:
+        return None
+    stamp, _, row_id = value.rpartition(',')
+    if not stamp or not row_id.isdigit():
+        raise ValueError('invalid cursor')
+    return stamp, int(row_id)
+
+@timed(stage_timers['db_read'])
+def get_history_page(limit=100, before=None):
+    return load_history_store().history_page(limit, before)
 
 def get_history():
-    conn = sqlite3.connect('securepass_history.db')
-    c = conn.cursor()
-    c.execute("SELECT password, strength, label, entropy, timestamp FROM checks ORDER BY timestamp DESC LIMIT 100")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    return get_history_page()[0]
 
 def clear_history():
-    conn = sqlite3.connect('securepass_history.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM checks")
-    conn.commit()
-    conn.close()
+    history_writer.flush()
+    load_history_store().clear_history()
 
+@timed(stage_timers['db_write'])
 def save_favorite(password):
-    conn = sqlite3.connect('securepass_history.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO favorites (password) VALUES (?)", (password,))
-    conn.commit()
-    conn.close()
+    load_history_store().add_favorite(password)
+
+@timed(stage_timers['db_read'])
+def get_counts():
+    return load_history_store().counts()
+
+@timed(stage_timers['db_read'])
+def get_favorites_page(limit=20, before=None):
+    return load_history_store().favorites_page(limit, before)
 
 def get_favorites():
-    conn = sqlite3.connect('securepass_history.db')
-    c = conn.cursor()
-    c.execute("SELECT password, created FROM favorites ORDER BY created DESC LIMIT 20")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    return get_favorites_page()[0]
+
+def history_hashed():
+    # The hashed store keeps digests only, so its pages carry no passwords.
+    return load_history_store().hashed
+
+@timed(stage_timers['db_read'])
+def times_seen(password):
+    # Checks still in the write-behind queue are not counted yet.
+    return load_history_store().seen(password)
 
 # ============================= PASSWORD UTILS =============================
-def calculate_entropy(pw):
-    size = 0
-    if re.search(r'[a-z]', pw): size += 26
-    if re.search(r'[A-Z]', pw): size += 26
-    if re.search(r'\d', pw): size += 10
-    if re.search(r'[!@#$%^&*()_+\-=\[\]{};:"\\|,.<>\/?]', pw): size += 32
-    return len(pw) * math.log2(size) if size > 0 else 0
+# Every constant the scorer uses lives here. The same dict is embedded into the
+# page as JSON and drives the in-browser port of calculate_strength, so the two
+# implementations can only differ in code, never in numbers.
+STRENGTH_RULES = {
+    'symbols': '!@#$%^&*()_+-=[]{};:"\\|,.<>/?',
+    'special': '!@#$%^&*',
+    'weak_sequences': ["123", "abc", "qwe", "password", "admin", "letmein"],
+    'pool_sizes': {'lower': 26, 'upper': 26, 'digits': 10, 'symbols': 32},
+    'length_bonus': [[8, 20], [12, 30], [16, 25], [20, 15]],
+    'class_bonus': [['upper', 15], ['lower', 10], ['digits', 15], ['special', 25]],
+    'entropy_weight': 1.2,
+    'entropy_cap': 60,
+    'triple_penalty': 30,
+    'sequence_penalty': 50,
+    'bands': [
+        [40, "Very Weak", "#ff3b30"],
+        [60, "Weak", "#ff9500"],
+        [80, "Moderate", "#ffcc00"],
+        [95, "Strong", "#34c759"],
+        [None, "Very Strong", "#00e676"]
+    ],
+    'min_length': 12,
+    'suggestions': [
+        ['length', "Use at least 12 characters"],
+        ['upper', "Add uppercase letters"],
+        ['digits', "Include numbers"],
+        ['special', "Add special symbols"]
+    ],
+    'no_suggestions': "Outstanding! Extremely secure password."
+}
 
-def calculate_strength(password):
-    if not password:
-        return 0, "No Password", "#666", [], 0
-    length = len(password)
-    entropy = calculate_entropy(password)
+LOWER_CHARS = frozenset(string.ascii_lowercase)
+UPPER_CHARS = frozenset(string.ascii_uppercase)
+SYMBOL_CHARS = frozenset(STRENGTH_RULES['symbols'])
+SPECIAL_CHARS = frozenset(STRENGTH_RULES['special'])
+WEAK_SEQUENCES = tuple(STRENGTH_RULES['weak_sequences'])
+
+PasswordFeatures = namedtuple('PasswordFeatures', [
+    'length', 'lower', 'upper', 'digits', 'symbols', 'special',
+    'has_triple', 'sequences'
+])
+
+def analyze_password(pw):
+    # One scan over the password; everything the scorer needs comes from here.
+    # Digits use isdecimal() to match re's \d, and runs of newlines never count
+    # as a triple because '.' in the old (.)\1\1 check did not match '\n'.
+    lower = upper = digits = symbols = special = 0
+    run = 0
+    triple = False
+    prev = None
+    for ch in pw:
+        if ch in LOWER_CHARS: lower += 1
+        elif ch in UPPER_CHARS: upper += 1
+        elif ch.isdecimal(): digits += 1
+        elif ch in SYMBOL_CHARS:
+            symbols += 1
+            if ch in SPECIAL_CHARS: special += 1
+        if ch == prev:
+            run += 1
+            if run >= 3 and ch != '\n': triple = True
+        else:
+            run = 1
+            prev = ch
+    lowered = pw.lower()
+    sequences = tuple(seq for seq in WEAK_SEQUENCES if seq in lowered)
+    return PasswordFeatures(len(pw), lower, upper, digits, symbols, special, triple, sequences)
+
+def calculate_entropy(pw, features=None):
+    f = features or analyze_password(pw)
+    size = sum(bonus for feature, bonus in STRENGTH_RULES['pool_sizes'].items() if getattr(f, feature))
+    return f.length * math.log2(size) if size > 0 else 0
+
+def strength_score(f, entropy):
+    r = STRENGTH_RULES
     score = 0
     
-    if length >= 8: score += 20
-    if length >= 12: score += 30
-    if length >= 16: score += 25
-    if length >= 20: score += 15
+    for minimum, bonus in r['length_bonus']:
+        if f.length >= minimum: score += bonus
+    for feature, bonus in r['class_bonus']:
+        if getattr(f, feature): score += bonus
     
-    if re.search(r'[A-Z]', password): score += 15
-    if re.search(r'[a-z]', password): score += 10
-    if re.search(r'\d', password): score += 15
-    if re.search(r'[!@#$%^&*]', password): score += 25
+    score += min(entropy * r['entropy_weight'], r['entropy_cap'])
     
-    score += min(entropy * 1.2, 60)
+    if f.has_triple: score -= r['triple_penalty']
+    if f.sequences: score -= r['sequence_penalty']
     
-    if re.search(r'(.)\1\1', password): score -= 30
-    if re.search(r'123|abc|qwe|password|admin|letmein', password.lower()): score -= 50
-    
-    score = max(0, min(100, score))
+    return max(0, min(100, score))
+
+@timed(stage_timers['score'])
+def calculate_strength(password):
+    if not password:
+        return 0, "No Password", "#666", [], 0
+    r = STRENGTH_RULES
+    f = analyze_password(password)
+    length = f.length
+    entropy = calculate_entropy(password, f)
+    score = strength_score(f, entropy)
     
-    if score < 40: label, color = "Very Weak", "#ff3b30"
-    elif score < 60: label, color = "Weak", "#ff9500"
-    elif score < 80: label, color = "Moderate", "#ffcc00"
-    elif score < 95: label, color = "Strong", "#34c759"
-    else: label, color = "Very Strong", "#00e676"
+    for limit, label, color in r['bands']:
+        if limit is None or score < limit: break
     
-    suggestions = []
-    if len(password) < 12: suggestions.append("Use at least 12 characters")
-    if not re.search(r'[A-Z]', password): suggestions.append("Add uppercase letters")
-    if not re.search(r'\d', password): suggestions.append("Include numbers")
-    if not re.search(r'[!@#$%^&*]', password): suggestions.append("Add special symbols")
-    if not suggestions: suggestions = ["Outstanding! Extremely secure password."]
+    suggestions = [text for feature, text in r['suggestions']
+                   if (length < r['min_length'] if feature == 'length' else not getattr(f, feature))]
+    if not suggestions: suggestions = [r['no_suggestions']]
     
     return round(score), label, color, suggestions, round(entropy, 2)
 
-def generate_secure_password(length=18, upper=True, lower=True, digits=True, symbols=True):
+MAX_BATCH_SIZE = 10000
+# Below this many distinct passwords, NumPy's per-call overhead outweighs
+# what vectorizing saves.
+MIN_VECTOR_BATCH = 64
+
+CLASS_BITS = {'lower': 1, 'upper': 2, 'digits': 4, 'symbols': 8, 'special': 16}
+
+@lru_cache(maxsize=1)
+def ascii_class_table():
+    import numpy as np
+    table = np.zeros(128, dtype=np.uint8)
+    for code in range(128):
+        ch = chr(code)
+        if ch in LOWER_CHARS: table[code] = CLASS_BITS['lower']
+        elif ch in UPPER_CHARS: table[code] = CLASS_BITS['upper']
+        elif ch.isdecimal(): table[code] = CLASS_BITS['digits']
+        elif ch in SYMBOL_CHARS:
+            table[code] = CLASS_BITS['symbols'] | (CLASS_BITS['special'] if ch in SPECIAL_CHARS else 0)
+    return table
+
+@lru_cache(maxsize=1)
+def weak_sequence_pattern():
+    return re.compile('|'.join(map(re.escape, WEAK_SEQUENCES)))
+
+def calculate_strength_vectors(passwords):
+    # calculate_strength over many non-empty passwords at once, as result
+    # dicts. All of them are joined into one array of code points, the
+    # per-password features come from segment reductions, and the score is
+    # computed as arrays with the same float operations in the same order, so
+    # every result is identical to calculate_strength's.
+    import numpy as np
+    r = STRENGTH_RULES
+    n = len(passwords)
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=n)
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    joined = ''.join(passwords)
+    codes = np.frombuffer(joined.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+    owner = np.repeat(np.arange(n), lengths)
+
+    flags = np.zeros(len(codes), dtype=np.uint8)
+    ascii_mask = codes < 128
+    flags[ascii_mask] = ascii_class_table()[codes[ascii_mask]]
+    if not ascii_mask.all():
+        # Outside ASCII only decimal digits (isdecimal, like re's \d) count.
+        unique, inverse = np.unique(codes[~ascii_mask], return_inverse=True)
+        decimal = np.array([chr(c).isdecimal() for c in unique.tolist()], dtype=bool)
+        flags[~ascii_mask] = np.where(decimal[inverse], CLASS_BITS['digits'], 0)
+    present = np.bitwise_or.reduceat(flags, starts)
+
+    # A triple is three equal code points inside one password, never '\n'.
+    triple = np.zeros(n, dtype=bool)
+    if len(codes) > 2:
+        same = (codes[2:] == codes[1:-1]) & (codes[1:-1] == codes[:-2]) & (codes[2:] != 10)
+        same &= owner[2:] == owner[:-2]
+        triple[owner[2:][same]] = True
+
+    # Weak sequences are searched in one pass over the lowered passwords,
+    # joined by a character no sequence contains so no match can span two.
+    sequence = np.zeros(n, dtype=bool)
+    separator = next(ch for ch in '\0\n\x1f' if not any(ch in seq for seq in WEAK_SEQUENCES))
+    lowered = separator.join(passwords).lower()
+    if len(lowered) == len(joined) + n - 1:
+        found = [match.start() for match in weak_sequence_pattern().finditer(lowered)]
+        sequence[np.searchsorted(starts + np.arange(n), found, side='right') - 1] = True
+    else:
+        # Some character lowers to several (İ), so offsets would drift.
+        sequence[:] = [any(seq in pw.lower() for seq in WEAK_SEQUENCES) for pw in passwords]
+
+    pool = [0]
+    for mask in range(1, 16):
+        size = sum(bonus for feature, bonus in r['pool_sizes'].items() if mask & CLASS_BITS[feature])
+        pool.append(math.log2(size))
+    pool_mask = present & 15
+    entropy = lengths * np.array(pool)[pool_mask]
+    entropy[pool_mask == 0] = 0
+
+    score = np.zeros(n, dtype=np.int64)
+    for minimum, bonus in r['length_bonus']:
+        score += (lengths >= minimum) * bonus
+    for feature, bonus in r['class_bonus']:
+        score += ((present & CLASS_BITS[feature]) > 0) * bonus
+    score = score + np.minimum(entropy * r['entropy_weight'], r['entropy_cap'])
+    score = np.where(triple, score - r['triple_penalty'], score)
+    score = np.where(sequence, score - r['sequence_penalty'], score)
+    score = np.maximum(0, np.minimum(100, score))
+
+    limits = [limit for limit, _, _ in r['bands'] if limit is not None]
+    band = np.searchsorted(np.array(limits, dtype=float), score, side='right')
+    missing = np.zeros(n, dtype=np.int64)
+    for bit, (feature, _) in enumerate(r['suggestions']):
+        lacking = lengths < r['min_length'] if feature == 'length' else (present & CLASS_BITS[feature]) == 0
+        missing |= lacking.astype(np.int64) << bit
+    advice = []
+    for combo in range(1 << len(r['suggestions'])):
+        texts = [text for bit, (_, text) in enumerate(r['suggestions']) if combo >> bit & 1]
+        advice.append(texts or [r['no_suggestions']])
+
+    # round(x, 2) is correctly rounded; rint(100x) / 100 agrees with it
+    # except next to a tie, so only those go through round(). Like
+    # calculate_entropy, an empty character pool is the integer 0.
+    rounded = np.round(entropy, 2).tolist()
+    scaled = entropy * 100
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[i] = round(float(entropy[i]), 2)
+    for i in np.flatnonzero(pool_mask == 0).tolist():
+        rounded[i] = 0
+    bands = [(label, color) for _, label, color in r['bands']]
+    return [{'strength': s, 'label': bands[b][0], 'color': bands[b][1], 'suggestions': advice[m], 'entropy': e}
+            for s, b, m, e in zip(np.rint(score).astype(np.int64).tolist(), band.tolist(), missing.tolist(), rounded)]
+
+def calculate_strength_batch(passwords):
+    # Dumps are full of repeats, so each distinct password is scored once and
+    # the results are fanned back out in input order. Large batches are
+    # scored as arrays; suggestion lists are shared between results.
+    distinct = [pw for pw in dict.fromkeys(passwords) if pw]
+    if len(distinct) >= MIN_VECTOR_BATCH:
+        results = dict(zip(distinct, calculate_strength_vectors(distinct)))
+    else:
+        results = {pw: strength_result(*calculate_strength(pw)) for pw in distinct}
+    results[''] = strength_result(*calculate_strength(''))
+    return [results[pw] for pw in passwords]
+
+def strength_result(strength, label, color, suggestions, entropy):
+    return {'strength': strength, 'label': label, 'color': color, 'suggestions': suggestions, 'entropy': entropy}
+
+@lazy
+def load_estimator():
+    # Importing estimator builds its ranked-word automaton.
+    import estimator
+    return estimator
+
+# ============================= RESULT CACHE =============================
+class MemoryBackend:
+    # Same get/set(ex=) surface as a Redis client, for single-process use and
+    # for exercising the shared-cache path without a server.
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None: return None
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else None, value)
+
+class StrengthCache:
+    # LRU + TTL cache in front of calculate_strength. Entries are keyed by a
+    # keyed BLAKE2b digest so plaintext passwords never sit in the cache or in
+    # the optional shared backend. Workers sharing a backend must share a key.
+    def __init__(self, maxsize=4096, ttl=300.0, key=None, backend=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key or secrets.token_bytes(32)
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def _digest(self, password):
+        return hashlib.blake2b(password.encode('utf-8', 'surrogatepass'), key=self.key, digest_size=16).hexdigest()
+
+    def get(self, password):
+        if not self.enabled:
+            return calculate_strength(password)
+        digest = self._digest(password)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[1]
+        result = None
+        if self.backend is not None:
+            raw = self.backend.get('strength:' + digest)
+            if raw is not None:
+                result = tuple(json.loads(raw))
+                self.shared_hits += 1
+        if result is None:
+            result = calculate_strength(password)
+            self.misses += 1
+            if self.backend is not None:
+                self.backend.set('strength:' + digest, json.dumps(result), ex=max(1, int(self.ttl)))
+        with self._lock:
+            self._entries[digest] = (now + self.ttl, result)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses
+        }
+
+def strength_cache_from_env():
+    # STRENGTH_CACHE_SIZE=0 turns the cache off. STRENGTH_CACHE_REDIS_URL adds
+    # a shared tier across workers (needs the redis package).
+    key = os.environ.get('STRENGTH_CACHE_KEY')
+    backend = None
+    url = os.environ.get('STRENGTH_CACHE_REDIS_URL')
+    if url:
+        import redis
+        backend = redis.Redis.from_url(url)
+    return StrengthCache(
+        maxsize=int(os.environ.get('STRENGTH_CACHE_SIZE', 4096)),
+        ttl=float(os.environ.get('STRENGTH_CACHE_TTL', 300)),
+        key=bytes.fromhex(key) if key else None,
+        backend=backend
+    )
+
+strength_cache = strength_cache_from_env()
+
+GENERATOR_SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+MAX_GENERATE_BATCH = 1000000
+MAX_GENERATE_LENGTH = 1024
+# count * length cap for a batch answered as one JSON body; larger ones must stream.
+MAX_BUFFERED_GENERATE_CHARS = 4000000
+
+def password_charset(upper=True, lower=True, digits=True, symbols=True):
     chars = ""
     if lower: chars += string.ascii_lowercase
     if upper: chars += string.ascii_uppercase
     if digits: chars += string.digits
-    if symbols: chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
-    if not chars: return "Enable at least one option"
-    return ''.join(secrets.choice(chars) for _ in range(length))
+    if symbols: chars += GENERATOR_SYMBOLS
+    return chars
+
+def generate_passwords(count, length=18, upper=True, lower=True, digits=True, symbols=True):
+    # Draws os.urandom in blocks and maps bytes to characters with one
+    # bytes.translate call. Bytes at or above the largest multiple of the
+    # charset size are deleted rather than wrapped, so every character is
+    # equally likely (rejection sampling, no modulo bias).
+    chars = password_charset(upper, lower, digits, symbols)
+    if not chars:
+        raise ValueError("Enable at least one option")
+    if length < 1:
+        raise ValueError("length must be at least 1")
+    limit = 256 - 256 % len(chars)
+    table = bytes(ord(chars[b % len(chars)]) if b < limit else 0 for b in range(256))
+    rejected = bytes(range(limit, 256))
+    block_size = min(1 << 16, max(64, count * length * 256 // limit + 64))
+    buffer = ""
+    while count > 0:
+        while len(buffer) < length:
+            buffer += os.urandom(block_size).translate(table, rejected).decode('ascii')
+        ready = min(count, len(buffer) // length)
+        for i in range(ready):
+            yield buffer[i * length:(i + 1) * length]
+        buffer = buffer[ready * length:]
+        count -= ready
+
+def generate_secure_password(length=18, upper=True, lower=True, digits=True, symbols=True):
+    if not password_charset(upper, lower, digits, symbols): return "Enable at least one option"
+    return next(generate_passwords(1, length, upper, lower, digits, symbols))
+
+AMBIGUOUS_CHARS = "Il1|O0o"
+MAX_POLICY_LENGTH = 64
+MAX_POLICY_MINIMUM = 3
+# Largest ways table (states x (length + 1)) a policy may build. The worst
+# policy within the caps above needs about 200,000 cells, under a second and
+# a few tens of MB; policy_generator keeps a handful of tables cached.
+MAX_POLICY_CELLS = 250000
+
+class PolicyGenerator:
+    # Draws uniformly from every password that satisfies a policy, in one pass
+    # with no retries. A state is (class counts capped at their minimums, has
+    # a !@#$%^&* special appeared, last group, current run length), and
+    # ways[r][state] is the number of compliant ways to write r more
+    # characters from it. Each position picks its move with probability
+    # proportional to those counts, so every compliant password is equally
+    # likely and the entropy is exactly log2 of the total.
+    #
+    # The score floor is checked against a password's class makeup, assuming
+    # the sequence (and, if allowed, triple) penalty wherever the characters
+    # could produce it, so every output scores at least min_score.
+    def __init__(self, length, groups, minimums, no_triples=True, min_score=0):
+        self.length = length
+        self.groups = groups
+        self.minimums = minimums
+        self.no_triples = no_triples
+        self.min_score = min_score
+        self.caps = tuple(max(m, 1) for m in minimums)
+
+        self.start = (0,) * len(self.caps) + (0, -1, 1)
+        self.moves, pending = {}, [self.start]
+        while pending:
+            state = pending.pop()
+            if state not in self.moves:
+                self.moves[state] = self.transitions(state)
+                pending += [nxt for _, nxt, _ in self.moves[state]]
+        if len(self.moves) * (length + 1) > MAX_POLICY_CELLS:
+            raise ValueError("Policy is too large; lower the length or the minimums")
+
+        # Layers are lists indexed like self.index, which is much cheaper to
+        # fill than dicts keyed by state tuples.
+        self.index = {state: i for i, state in enumerate(self.moves)}
+        steps = [[(n, self.index[nxt]) for n, nxt, _ in moves] for moves in self.moves.values()]
+        ways = [int(self.accepts(state)) for state in self.moves]
+        self.ways = [ways]
+        for _ in range(length):
+            prev = ways
+            ways = [sum(n * prev[j] for n, j in step) for step in steps]
+            self.ways.append(ways)
+        self.total = self.ways[length][self.index[self.start]]
+        if not self.total:
+            raise ValueError("No password satisfies this policy")
+        self.entropy = math.log2(self.total)
+
+    def transitions(self, state):
+        *counts, special, last, run = state
+        moves = []
+        for index, (bucket, chars, is_special) in enumerate(self.groups):
+            nxt = list(counts)
+            nxt[bucket] = min(nxt[bucket] + 1, self.caps[bucket])
+            nxt = tuple(nxt) + (special or int(is_special),)
+            if not self.no_triples:
+                moves.append((len(chars), nxt + (-1, 1), index))
+            elif index == last:
+                if run == 1: moves.append((1, nxt + (index, 2), 'same'))
+                if len(chars) > 1: moves.append((len(chars) - 1, nxt + (index, 1), 'other'))
+            else:
+                moves.append((len(chars), nxt + (index, 1), index))
+        return moves
+
+    def accepts(self, state):
+        *counts, special, _, _ = state
+        if any(c < m for c, m in zip(counts, self.minimums)):
+            return False
+        present = [c > 0 for c in counts]
+        available = ''.join(chars for bucket, chars, _ in self.groups if present[bucket]).lower()
+        f = PasswordFeatures(
+            self.length, *present, special,
+            has_triple=not self.no_triples and self.length >= 3,
+            sequences=tuple(seq for seq in WEAK_SEQUENCES if set(seq) <= set(available))
+        )
+        return round(strength_score(f, calculate_entropy('', f))) >= self.min_score
+
+    def generate(self):
+        state, chars, prev = self.start, [], None
+        for remaining in range(self.length, 0, -1):
+            pick = secrets.randbelow(self.ways[remaining][self.index[state]])
+            for n, nxt, move in self.moves[state]:
+                weight = n * self.ways[remaining - 1][self.index[nxt]]
+                if pick < weight: break
+                pick -= weight
+            group = self.groups[nxt[-2]][1] if self.no_triples else self.groups[move][1]
+            if move == 'same':
+                ch = prev
+            elif move == 'other':
+                i = secrets.randbelow(len(group) - 1)
+                ch = group[i + (i >= group.index(prev))]
+            else:
+                ch = group[secrets.randbelow(len(group))]
+            chars.append(ch)
+            state, prev = nxt, ch
+        return ''.join(chars)
+
+def policy_generator(length=18, min_upper=1, min_lower=1, min_digits=1, min_symbols=1,
+                     exclude_ambiguous=True, exclude="", no_triples=True, min_score=0):
+    # Only the set of excluded characters matters, so it is canonicalized
+    # before it becomes part of the cache key.
+    if not 1 <= length <= MAX_POLICY_LENGTH:
+        raise ValueError(f"length must be between 1 and {MAX_POLICY_LENGTH}")
+    if any(m is not None and not 0 <= m <= MAX_POLICY_MINIMUM for m in (min_upper, min_lower, min_digits, min_symbols)):
+        raise ValueError(f"minimums must be null or between 0 and {MAX_POLICY_MINIMUM}")
+    return build_policy_generator(length, min_upper, min_lower, min_digits, min_symbols, bool(exclude_ambiguous),
+                                  ''.join(sorted(set(exclude))), bool(no_triples), min_score)
+
+@lru_cache(maxsize=8)
+def build_policy_generator(length, min_upper, min_lower, min_digits, min_symbols,
+                           exclude_ambiguous, exclude, no_triples, min_score):
+    excluded = set(exclude) | (set(AMBIGUOUS_CHARS) if exclude_ambiguous else set())
+    keep = lambda chars: ''.join(ch for ch in chars if ch not in excluded)
+    specials = keep(c for c in GENERATOR_SYMBOLS if c in SPECIAL_CHARS)
+    others = keep(c for c in GENERATOR_SYMBOLS if c not in SPECIAL_CHARS)
+    # Buckets: 0 lower, 1 upper, 2 digits, 3 symbols (special and other share it).
+    # A minimum of None leaves the class out entirely.
+    groups = [(0, keep(string.ascii_lowercase), False), (1, keep(string.ascii_uppercase), False),
+              (2, keep(string.digits), False), (3, specials, True), (3, others, False)]
+    minimums = (min_lower, min_upper, min_digits, min_symbols)
+    groups = [g for g in groups if g[1] and minimums[g[0]] is not None]
+    if not groups:
+        raise ValueError("Enable at least one option")
+    minimums = tuple(m or 0 for m in minimums)
+    return PolicyGenerator(length, groups, minimums, no_triples, min_score)
+
+def generate_policy_password(**policy):
+    generator = policy_generator(**policy)
+    return generator.generate(), generator.entropy
+
+# Set PASSPHRASE_WORDLIST to a file compiled with wordlist.py (e.g. the EFF
+# large diceware list) to enable passphrase generation.
+@lazy
+def load_passphrase_words():
+    return WordList(os.environ['PASSPHRASE_WORDLIST']) if os.environ.get('PASSPHRASE_WORDLIST') else None
 
+MAX_PASSPHRASE_WORDS = 32
+CAPITALIZE = {'lower': str.lower, 'upper': str.upper, 'title': str.capitalize}
+
+def generate_passphrase(words=6, separator='-', capitalize='lower', digits=0, wordlist=None):
+    # Words are drawn independently and uniformly; `digits` distinct words get
+    # one random digit appended. Word lists only hold a-z words and separators
+    # may not contain letters or digits, so each passphrase decodes to exactly
+    # one choice and the entropy below is exact, not an estimate.
+    wordlist = wordlist or load_passphrase_words()
+    if wordlist is None:
+        raise ValueError("Passphrase word list is not configured")
+    if len(wordlist) < 2:
+        raise ValueError("Passphrase word list is too small")
+    if not 1 <= words <= MAX_PASSPHRASE_WORDS:
+        raise ValueError(f"words must be between 1 and {MAX_PASSPHRASE_WORDS}")
+    if not 0 <= digits <= words:
+        raise ValueError("digits must be between 0 and the number of words")
+    if capitalize not in CAPITALIZE:
+        raise ValueError(f"capitalize must be one of {', '.join(CAPITALIZE)}")
+    if any(ch.isalnum() for ch in separator) or (not separator and capitalize != 'title' and words > 1):
+        raise ValueError("separator must not contain letters or digits, and may only be empty with title case")
+    chosen = [CAPITALIZE[capitalize](wordlist[secrets.randbelow(len(wordlist))]) for _ in range(words)]
+    for i in secrets.SystemRandom().sample(range(words), digits):
+        chosen[i] += str(secrets.randbelow(10))
+    entropy = words * math.log2(len(wordlist)) + math.log2(math.comb(words, digits)) + digits * math.log2(10)
+    return separator.join(chosen), entropy
+
+# Set BREACH_CORPUS to a prefix built with breach_corpus.py to check exact
+# membership in a leaked-password list as well as the common fragments below.
+@lazy
+def load_breach_corpus():
+    return BreachCorpus(os.environ['BREACH_CORPUS']) if os.environ.get('BREACH_CORPUS') else None
+
+COMMON_PASSWORDS = ["password", "123456", "admin", "letmein", "qwerty", "welcome", "monkey", "dragon"]
+
+# BREACH_PATTERNS may point at an automaton built with pattern_matcher.py
+# (dictionary words, keyboard walks, leet variants) to replace the short list.
+@lazy
+def load_breach_matcher():
+    if os.environ.get('BREACH_PATTERNS'):
+        return load_automaton(os.environ['BREACH_PATTERNS'])
+    return AhoCorasick.build(COMMON_PASSWORDS)
+
+# Not stage-timed: the check takes a few microseconds, less than recording it.
 def check_breach_similarity(password):
-    common = ["password", "123456", "admin", "letmein", "qwerty", "welcome", "monkey", "dragon"]
-    for common_pw in common:
-        if common_pw.lower() in password.lower():
-            return True
-    return False
+    corpus = load_breach_corpus()
+    if corpus is not None and password in corpus:
+        return True
+    return load_breach_matcher().contains_any(password.lower())
+
+# ============================= ML SCORER =============================
+# Feature contract for advanced_model.pth. The model takes 12 raw, unscaled
+# values in this order (it was trained without input scaling):
+#    0  length
+#  1-4  1.0 if the password has a lowercase / uppercase / decimal digit / symbol
+#    5  calculate_entropy, in bits
+#    6  1.0 if it contains a weak sequence (STRENGTH_RULES['weak_sequences'])
+# 7-11  0.0
+# The checkpoint carries no feature names. Slots 0-5 are inferred from the
+# running statistics of the BatchNorm after the first layer: pushing real
+# passwords through these definitions reproduces its per-unit means with a
+# correlation of 0.999. Slots 6-11 behave as 0/1 weakness flags whose
+# training definitions cannot be recovered. Slot 6 is the weak-sequence
+# flag because that agrees best with the rule-based bands; the rest are
+# left unflagged.
+# The five output classes map, in order, onto STRENGTH_RULES['bands'].
+ML_MODEL_PATH = os.environ.get('ML_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'advanced_model.pth'))
+ML_FEATURES = 12
+
+def ml_features(password):
+    f = analyze_password(password)
+    features = [
+        float(f.length),
+        float(f.lower > 0),
+        float(f.upper > 0),
+        float(f.digits > 0),
+        float(f.symbols > 0),
+        float(calculate_entropy(password, f)),
+        float(bool(f.sequences))
+    ]
+    return features + [0.0] * (ML_FEATURES - len(features))
+
+@lazy
+def load_ml_model():
+    # Off unless ML_SCORER=1, so deployments that never use it skip numpy.
+    if os.environ.get('ML_SCORER') != '1':
+        return None
+    from ml_scorer import MLPScorer
+    return MLPScorer.from_file(ML_MODEL_PATH, os.environ.get('ML_ACTIVATION', 'relu'))
+
+def ml_predict(passwords):
+    probabilities = load_ml_model().predict_proba([ml_features(pw) for pw in passwords])
+    results = []
+    for row in probabilities:
+        cls = int(row.argmax())
+        _, label, color = STRENGTH_RULES['bands'][cls]
+        results.append({
+            'class': cls,
+            'label': label,
+            'color': color,
+            'confidence': round(float(row[cls]), 4),
+            'probabilities': [round(float(p), 4) for p in row]
+        })
+    return results
 
 # ============================= FULL HTML WITH ENHANCED LAYOUT =============================
 HTML_TEMPLATE = """
@@ -665,8 +1445,8 @@ HTML_TEMPLATE = """
         
         <div class="sidebar-section">
           <h3>Security Stats</h3>
-          <p><strong>History:</strong> {{ history|length }} checks</p>
-          <p><strong>Favorites:</strong> {{ favorites|length }} saved</p>
+          <p><strong>History:</strong> <span id="historyCount">-</span> checks</p>
+          <p><strong>Favorites:</strong> <span id="favoritesCount">-</span> saved</p>
         </div>
       </div>
       
@@ -796,15 +1576,24 @@ HTML_TEMPLATE = """
         document.getElementById('mainApp').classList.add('show');
         document.getElementById('welcome').style.display = 'none';
         loadFavorites();
+        loadCounts();
       }, 800);
     }
+
+    // The page itself is static and cached; the sidebar counters come from here.
+    function loadCounts() {
+      fetch('/api/counts').then(r => r.json()).then(data => {
+        document.getElementById('historyCount').textContent = data.history;
+        document.getElementById('favoritesCount').textContent = data.favorites;
+      }).catch(err => console.error('Error loading counts:', err));
+    }
     
     function switchTab(tab, e) {
       document.querySelectorAll('[id="checker"], [id="history"]').forEach(el => el.style.display = 'none');
       document.querySelectorAll('.tab').forEach(b => b.classList.remove('active'));
       document.getElementById(tab).style.display = 'block';
       e.target.classList.add('active');
-      if (tab === 'history') loadHistory();
+      if (tab === 'history') { loadHistory(); loadCounts(); }
     }
     
     const input = document.getElementById('password');
@@ -816,32 +1605,98 @@ HTML_TEMPLATE = """
     const suggestions = document.getElementById('suggestions');
     const tips = document.getElementById('tips');
     
+    // In-browser port of calculate_strength/calculate_entropy. All numbers come
+    // from STRENGTH_RULES, which the server renders from the same dict it scores
+    // with; round() and isdecimal() are mirrored so results match exactly.
+    const STRENGTH_RULES = {{ strength_rules|tojson }};
+    const CHECK_DEBOUNCE_MS = 800;
+    
+    function pyRound(x) {
+      const r = Math.round(x);
+      return (r - x === 0.5 && r % 2 !== 0) ? r - 1 : r;
+    }
+    
+    function analyzePassword(pw, R) {
+      const f = {length: 0, lower: 0, upper: 0, digits: 0, symbols: 0, special: 0, has_triple: false, sequences: []};
+      let prev = null, run = 0;
+      for (const ch of pw) {
+        f.length++;
+        if (ch >= 'a' && ch <= 'z') f.lower++;
+        else if (ch >= 'A' && ch <= 'Z') f.upper++;
+        else if (/^\\p{Nd}$/u.test(ch)) f.digits++;
+        else if (ch.length === 1 && R.symbols.includes(ch)) {
+          f.symbols++;
+          if (R.special.includes(ch)) f.special++;
+        }
+        if (ch === prev) {
+          run++;
+          if (run >= 3 && ch !== '\\n') f.has_triple = true;
+        } else {
+          run = 1;
+          prev = ch;
+        }
+      }
+      const lowered = pw.toLowerCase();
+      f.sequences = R.weak_sequences.filter(seq => lowered.includes(seq));
+      return f;
+    }
+    
+    function calculateEntropy(f, R) {
+      let size = 0;
+      for (const [feature, bonus] of Object.entries(R.pool_sizes)) if (f[feature]) size += bonus;
+      return size > 0 ? f.length * Math.log2(size) : 0;
+    }
+    
+    function calculateStrength(pw, R) {
+      if (!pw) return {strength: 0, label: 'No Password', color: '#666', suggestions: [], entropy: 0};
+      const f = analyzePassword(pw, R);
+      const entropy = calculateEntropy(f, R);
+      let score = 0;
+      for (const [minimum, bonus] of R.length_bonus) if (f.length >= minimum) score += bonus;
+      for (const [feature, bonus] of R.class_bonus) if (f[feature]) score += bonus;
+      score += Math.min(entropy * R.entropy_weight, R.entropy_cap);
+      if (f.has_triple) score -= R.triple_penalty;
+      if (f.sequences.length) score -= R.sequence_penalty;
+      score = Math.max(0, Math.min(100, score));
+      let band;
+      for (band of R.bands) if (band[0] === null || score < band[0]) break;
+      let suggestions = R.suggestions
+        .filter(([feature]) => feature === 'length' ? f.length < R.min_length : !f[feature])
+        .map(([, text]) => text);
+      if (!suggestions.length) suggestions = [R.no_suggestions];
+      return {strength: pyRound(score), label: band[1], color: band[2], suggestions: suggestions, entropy: Number(entropy.toFixed(2))};
+    }
+    
+    // Scoring happens locally on every keystroke; the server only hears about
+    // the password once typing pauses, so history gets one row per password.
+    let checkTimer = null;
     input.addEventListener('input', () => {
-      const p = input.value;
+      const p = input.value.trim();
+      clearTimeout(checkTimer);
       if (!p) { reset(); return; }
-      fetch('/check', {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({password: p})
-      })
-      .then(r => r.json())
-      .then(d => {
-        fill.style.width = d.strength + '%';
-        fill.style.background = d.color;
-        label.textContent = d.label;
-        label.style.color = d.color;
-        percent.textContent = d.strength + '%';
-        entropy.textContent = d.entropy + ' bits';
-        lengthDisplay.textContent = p.length;
-        suggestions.style.display = 'block';
-        tips.innerHTML = '';
-        d.suggestions.forEach(s => {
-          let li = document.createElement('li');
-          li.textContent = s;
-          tips.appendChild(li);
-        });
-        if (d.strength >= 95) confetti({ particleCount: 200, spread: 70 });
+      const d = calculateStrength(p, STRENGTH_RULES);
+      fill.style.width = d.strength + '%';
+      fill.style.background = d.color;
+      label.textContent = d.label;
+      label.style.color = d.color;
+      percent.textContent = d.strength + '%';
+      entropy.textContent = d.entropy + ' bits';
+      lengthDisplay.textContent = input.value.length;
+      suggestions.style.display = 'block';
+      tips.innerHTML = '';
+      d.suggestions.forEach(s => {
+        let li = document.createElement('li');
+        li.textContent = s;
+        tips.appendChild(li);
       });
+      if (d.strength >= 95) confetti({ particleCount: 200, spread: 70 });
+      checkTimer = setTimeout(() => {
+        fetch('/check', {
+          method: 'POST',
+          headers: {'Content-Type': 'application/json'},
+          body: JSON.stringify({password: p})
+        }).catch(err => console.error('Error saving check:', err));
+      }, CHECK_DEBOUNCE_MS);
     });
     
     function reset() {
@@ -880,6 +1735,7 @@ HTML_TEMPLATE = """
       }).then(r => r.json()).then(() => {
         alert('⭐ Added to favorites!');
         loadFavorites();
+        loadCounts();
       });
     }
     
@@ -929,13 +1785,20 @@ HTML_TEMPLATE = """
           data.favorites.forEach(fav => {
             let div = document.createElement('div');
             div.className = 'fav-item';
-            div.textContent = fav[0];
-            div.title = 'Click to use this password';
-            div.onclick = () => { 
-              input.value = fav[0]; 
-              input.dispatchEvent(new Event('input'));
-              input.select();
-            };
+            if (data.hashed) {
+              // Only a digest was kept, so there is nothing to load back.
+              div.textContent = `Saved ${fav[1]}`;
+              div.title = 'Stored as a keyed digest; the password cannot be recalled';
+              div.style.cursor = 'default';
+            } else {
+              div.textContent = fav[0];
+              div.title = 'Click to use this password';
+              div.onclick = () => { 
+                input.value = fav[0]; 
+                input.dispatchEvent(new Event('input'));
+                input.select();
+              };
+            }
             list.appendChild(div);
           });
         }
@@ -945,7 +1808,9 @@ HTML_TEMPLATE = """
     function loadHistory() {
       fetch('/api/history').then(r => r.json()).then(data => {
         let html = '';
-        if (data.history && data.history.length > 0) {
+        if (data.hashed) {
+          html = '<p style="opacity: 0.7; text-align: center; padding: 20px;">History is stored as keyed digests only, so past checks cannot be listed.</p>';
+        } else if (data.history && data.history.length > 0) {
           data.history.forEach(h => {
             html += `<div style="padding: 12px; background: rgba(255,255,255,0.1); margin: 8px 0; border-radius: 10px;">
               <strong>${h[1]}%</strong> - ${h[2]} (${h[3]} bits) <code style="opacity: 0.7; font-size: 0.85rem;">${h[0].substring(0, 30)}${h[0].length > 30 ? '...' : ''}</code>
@@ -962,38 +1827,172 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# ============================= PAGE CACHE =============================
+# The page holds no per-request data (the counters load from /api/counts),
+# so it is rendered and gzipped once. The ETag hashes those bytes and
+# Last-Modified is when the source they come from last changed, so every
+# worker of a deploy agrees on both.
+@lazy
+def load_home_page():
+    body = app.jinja_env.from_string(HTML_TEMPLATE).render(strength_rules=STRENGTH_RULES).encode('utf-8')
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    modified = datetime.fromtimestamp(int(os.path.getmtime(__file__)), timezone.utc)
+    return body, gzip.compress(body, compresslevel=9), etag, modified
+
 # ============================= ROUTES =============================
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    if profiler.active: g.profiled = profiler.track()
+
+@app.teardown_request
+def record_latency(exc=None):
+    if g.pop('profiled', False): profiler.untrack()
+    started = g.pop('request_started', None)
+    if started is None: return
+    rule = request.url_rule.rule if request.url_rule else None
+    timer = route_timers.get(rule) or route_timers[None]
+    timer.observe(time.perf_counter() - started)
+
 @app.route('/')
 def home():
-    return render_template_string(HTML_TEMPLATE, history=get_history(), favorites=get_favorites())
+    body, gzipped, etag, modified = load_home_page()
+    if request.accept_encodings['gzip']:
+        response = Response(gzipped, mimetype='text/html')
+        response.content_encoding = 'gzip'
+        etag += '-gz'
+    else:
+        response = Response(body, mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.last_modified = modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def check_result(pwd, use_ml=False):
+    # Scoring only; callers persist the check themselves.
+    strength, label, color, suggestions, entropy = strength_cache.get(pwd)
+    with stage_timers['estimate'].time():
+        guesses = load_estimator().guesses_log10(pwd)
+    result = {
+        'strength': strength,
+        'label': label,
+        'color': color,
+        'suggestions': suggestions,
+        'entropy': entropy,
+        'guesses_log10': guesses
+    }
+    if use_ml: result['ml'] = ml_predict([pwd])[0]
+    return result
 
 @app.route('/check', methods=['POST'])
 def check():
     data = request.get_json()
     pwd = data.get('password', '').strip()
+    use_ml = data.get('scorer') == 'ml'
+    if use_ml and load_ml_model() is None:
+        return jsonify({'error': 'ml scorer is not enabled'}), 400
     if pwd:
-        strength, label, color, suggestions, entropy = calculate_strength(pwd)
-        save_check(pwd, strength, label, entropy)
-        return jsonify({
-            'strength': strength,
-            'label': label,
-            'color': color,
-            'suggestions': suggestions,
-            'entropy': entropy
-        })
+        result = check_result(pwd, use_ml)
+        save_check(pwd, result['strength'], result['label'], result['entropy'])
+        return jsonify(result)
     return jsonify({'error': 'empty'})
 
+@app.route('/check/batch', methods=['POST'])
+def check_batch():
+    data = request.get_json()
+    passwords = data.get('passwords')
+    if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+        return jsonify({'error': 'passwords must be a list of strings'}), 400
+    if len(passwords) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'at most {MAX_BATCH_SIZE} passwords per batch'}), 400
+    use_ml = data.get('scorer') == 'ml'
+    if use_ml and load_ml_model() is None:
+        return jsonify({'error': 'ml scorer is not enabled'}), 400
+    passwords = [p.strip() for p in passwords]
+    results = calculate_strength_batch(passwords)
+    if use_ml:
+        results = [dict(result, ml=ml) for result, ml in zip(results, ml_predict(passwords))]
+    return jsonify({'results': results})
+
 @app.route('/generate', methods=['POST'])
 def generate():
-    data = request.get_json()
+    payload, status = generate_payload(request.get_json())
+    return jsonify(payload), status
+
+def generate_payload(data):
+    # Returns (body, status) so the Flask and ASGI front ends share it.
+    if data.get('policy') is not None:
+        return generate_with_policy(data['policy'])
+    if data.get('passphrase') is not None:
+        return generate_with_passphrase(data['passphrase'])
+    length = data.get('length', 18)
+    if not isinstance(length, int) or not 1 <= length <= MAX_GENERATE_LENGTH:
+        return {'error': f'length must be between 1 and {MAX_GENERATE_LENGTH}'}, 400
     pwd = generate_secure_password(
-        length=data.get('length', 18),
+        length=length,
         upper=data.get('upper', True),
         lower=data.get('lower', True),
         digits=data.get('digits', True),
         symbols=data.get('symbols', True)
     )
-    return jsonify({'password': pwd})
+    return {'password': pwd}, 200
+
+POLICY_DEFAULTS = {'length': 18, 'min_upper': 1, 'min_lower': 1, 'min_digits': 1, 'min_symbols': 1,
+                   'exclude_ambiguous': True, 'exclude': "", 'no_triples': True, 'min_score': 0}
+
+def generate_with_policy(options):
+    if not isinstance(options, dict) or set(options) - set(POLICY_DEFAULTS):
+        return {'error': f'policy keys are {", ".join(POLICY_DEFAULTS)}'}, 400
+    policy = {**POLICY_DEFAULTS, **options}
+    if not isinstance(policy['length'], int) or not 1 <= policy['length'] <= MAX_POLICY_LENGTH:
+        return {'error': f'length must be between 1 and {MAX_POLICY_LENGTH}'}, 400
+    for key in ('min_upper', 'min_lower', 'min_digits', 'min_symbols'):
+        value = policy[key]
+        if value is not None and (not isinstance(value, int) or not 0 <= value <= MAX_POLICY_MINIMUM):
+            return {'error': f'{key} must be null or between 0 and {MAX_POLICY_MINIMUM}'}, 400
+    if not isinstance(policy['min_score'], int) or not 0 <= policy['min_score'] <= 100:
+        return {'error': 'min_score must be between 0 and 100'}, 400
+    if not isinstance(policy['exclude'], str):
+        return {'error': 'exclude must be a string'}, 400
+    try:
+        pwd, entropy = generate_policy_password(**policy)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    return {'password': pwd, 'entropy': entropy}, 200
+
+PASSPHRASE_DEFAULTS = {'words': 6, 'separator': '-', 'capitalize': 'lower', 'digits': 0}
+
+def generate_with_passphrase(options):
+    if not isinstance(options, dict) or set(options) - set(PASSPHRASE_DEFAULTS):
+        return {'error': f'passphrase keys are {", ".join(PASSPHRASE_DEFAULTS)}'}, 400
+    options = {**PASSPHRASE_DEFAULTS, **options}
+    if not all(isinstance(options[key], int) for key in ('words', 'digits')) or not isinstance(options['separator'], str):
+        return {'error': 'words and digits must be integers and separator a string'}, 400
+    try:
+        phrase, entropy = generate_passphrase(**options)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    # estimated_entropy is the character-pool figure /check reports, for comparison.
+    return {'password': phrase, 'entropy': entropy, 'estimated_entropy': calculate_entropy(phrase)}, 200
+
+@app.route('/generate/batch', methods=['POST'])
+def generate_batch():
+    data = request.get_json()
+    count, length = data.get('count', 100), data.get('length', 18)
+    if not isinstance(count, int) or not 1 <= count <= MAX_GENERATE_BATCH:
+        return jsonify({'error': f'count must be between 1 and {MAX_GENERATE_BATCH}'}), 400
+    if not isinstance(length, int) or not 1 <= length <= MAX_GENERATE_LENGTH:
+        return jsonify({'error': f'length must be between 1 and {MAX_GENERATE_LENGTH}'}), 400
+    options = {key: data.get(key, True) for key in ('upper', 'lower', 'digits', 'symbols')}
+    if not password_charset(**options):
+        return jsonify({'error': 'Enable at least one option'}), 400
+    if not data.get('stream') and count * length > MAX_BUFFERED_GENERATE_CHARS:
+        return jsonify({'error': f'count * length over {MAX_BUFFERED_GENERATE_CHARS} needs "stream": true'}), 400
+    passwords = generate_passwords(count, length, **options)
+    if data.get('stream'):
+        return Response((pw + '\n' for pw in passwords), mimetype='text/plain')
+    return jsonify({'passwords': list(passwords)})
 
 @app.route('/favorite', methods=['POST'])
 def favorite():
@@ -1004,13 +2003,88 @@ def favorite():
         return jsonify({'status': 'saved'})
     return jsonify({'error': 'empty'})
 
+def page_args(args, default_limit):
+    limit = args.get('limit', default_limit, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), parse_cursor(args.get('cursor'))
+
 @app.route('/favorites')
 def favorites():
-    return jsonify({'favorites': get_favorites()})
+    try:
+        limit, before = page_args(request.args, 20)
+    except ValueError:
+        return jsonify({'error': 'invalid cursor'}), 400
+    rows, next_cursor = get_favorites_page(limit, before)
+    return jsonify({'favorites': rows, 'next_cursor': next_cursor, 'hashed': history_hashed()})
 
 @app.route('/api/history')
 def api_history():
-    return jsonify({'history': get_history()})
+    try:
+        limit, before = page_args(request.args, 100)
+    except ValueError:
+        return jsonify({'error': 'invalid cursor'}), 400
+    rows, next_cursor = get_history_page(limit, before)
+    return jsonify({'history': rows, 'next_cursor': next_cursor, 'hashed': history_hashed()})
+
+@app.route('/api/history/seen', methods=['POST'])
+def api_history_seen():
+    # POST so the password stays out of URLs and access logs.
+    pwd = (request.get_json(silent=True) or {}).get('password')
+    if not isinstance(pwd, str) or not pwd:
+        return jsonify({'error': 'password must be a non-empty string'}), 400
+    return jsonify({'seen': times_seen(pwd)})
+
+@app.route('/api/counts')
+def api_counts():
+    checks, saved = get_counts()
+    return jsonify({'history': checks, 'favorites': saved})
+
+@app.route('/api/history/queue')
+def api_history_queue():
+    return jsonify(history_writer.stats())
+
+@app.route('/api/cache')
+def api_cache():
+    return jsonify(strength_cache.stats())
+
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def admin_authorized():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    # Profiles only the worker that receives the request; use PROFILE_SIGNAL
+    # to start every worker at once.
+    if not admin_authorized():
+        return jsonify({'error': 'not found'}), 404
+    if request.method == 'GET':
+        if request.args.get('format') == 'collapsed':
+            if not profiler.last: return jsonify({'error': 'no finished profile'}), 404
+            return Response(profiler.last['collapsed'], mimetype='text/plain')
+        return jsonify(profiler.status())
+    data = request.get_json(silent=True) or {}
+    seconds, fraction, interval_ms = data.get('seconds', 30), data.get('fraction', 0.1), data.get('interval_ms', 5)
+    if not all(isinstance(v, (int, float)) for v in (seconds, fraction, interval_ms)):
+        return jsonify({'error': 'seconds, fraction and interval_ms must be numbers'}), 400
+    if not (0 < seconds <= 600 and 0 < fraction <= 1 and 1 <= interval_ms <= 1000):
+        return jsonify({'error': 'need 0 < seconds <= 600, 0 < fraction <= 1, 1 <= interval_ms <= 1000'}), 400
+    if not profiler.start(seconds, fraction, interval_ms / 1000):
+        return jsonify({'error': 'a profile is already running'}), 409
+    return jsonify(profiler.status()), 202
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Registered after every route so all workers build the same slot layout.
+ROUTE_HELP = 'Request latency by route.'
+route_timers = {rule.rule: metrics.histogram('securepass_request_duration_seconds', ROUTE_HELP, route=rule.rule)
+                for rule in app.url_map.iter_rules()}
+route_timers[None] = metrics.histogram('securepass_request_duration_seconds', ROUTE_HELP, route='unmatched')
+
+if os.environ.get('PREWARM') == '1':
+    prewarm()
 
 if __name__ == '__main__':
     print("""
@@ -1030,4 +2104,5 @@ if __name__ == '__main__':
     ║   Open → http://127.0.0.1:5000                    ║
     ╚════════════════════════════════════════════════════╝
     """)
+    prewarm()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,208 @@
+import functools
+import glob
+import hashlib
+import mmap
+import os
+import threading
+import time
+from array import array
+
+# Latency histograms with HDR-style log-linear buckets: exact below 8us, then
+# four sub-buckets per power of two (at most 25% wide) up to 2**25us (~33s),
+# plus an overflow bucket. Values are recorded in whole microseconds.
+SUB_BUCKETS = 4
+LINEAR_LIMIT = 8
+MAX_BITS = 25
+OVERFLOW = LINEAR_LIMIT + (MAX_BITS - 3) * SUB_BUCKETS
+SLOTS = OVERFLOW + 2  # buckets, overflow, sum in nanoseconds
+
+def bucket_index(us):
+    if us < LINEAR_LIMIT:
+        return us
+    bits = us.bit_length()
+    if bits > MAX_BITS:
+        return OVERFLOW
+    return LINEAR_LIMIT + (bits - 4) * SUB_BUCKETS + (us >> (bits - 3)) - SUB_BUCKETS
+
+def bucket_upper_us(index):
+    # Exclusive upper bound of a bucket, i.e. its Prometheus "le" value.
+    if index < LINEAR_LIMIT:
+        return index + 1
+    octave, sub = divmod(index - LINEAR_LIMIT, SUB_BUCKETS)
+    return (sub + SUB_BUCKETS + 1) << (octave + 1)
+
+# ============================= REGISTRY =============================
+class Registry:
+    # Every histogram owns a fixed run of uint64 slots in one flat array. With
+    # a directory, each process maps its own <layout>-<pid>.bin file there and
+    # /metrics sums every file, so counts aggregate across Gunicorn workers
+    # (and survive worker restarts). Without one, slots live in process memory.
+    #
+    # Recording is a few plain slot increments, with no lock. Under the GIL a
+    # thread switch between an increment's read and write can drop a count on
+    # threaded servers; single-threaded workers are exact.
+    #
+    # A gauge is a single slot holding a non-negative integer that its process
+    # overwrites. A scrape sums it over the files of live processes only, so
+    # an exited worker's last value does not linger.
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.families = {}
+        self.series = []
+        self.offsets = []
+        self.size = 0
+        self._gauges = []
+        self._slots = None
+        self._file = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _register(self, kind, name, help_text, labels, slots):
+        if self._slots is not None:
+            raise RuntimeError("metrics must be registered before the first observation")
+        self.families.setdefault(name, (kind, help_text))
+        self.series.append((name, tuple(sorted(labels.items()))))
+        self.offsets.append(self.size)
+        self.size += slots
+        return self.offsets[-1]
+
+    def histogram(self, name, help_text, **labels):
+        return Histogram(self, self._register('histogram', name, help_text, labels, SLOTS))
+
+    def gauge(self, name, help_text, **labels):
+        offset = self._register('gauge', name, help_text, labels, 1)
+        self._gauges.append(offset)
+        return Gauge(self, offset)
+
+    @property
+    def layout(self):
+        return hashlib.blake2b(repr(self.series).encode(), digest_size=6).hexdigest()
+
+    def _open(self):
+        with self._lock:
+            if self._slots is None: self._map()
+        return self._slots
+
+    def _map(self):
+        size = self.size * 8
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{self.layout}-{os.getpid()}.bin')
+            with open(path, 'a+b') as f:
+                if os.fstat(f.fileno()).st_size != size: f.truncate(size)
+                self._file = mmap.mmap(f.fileno(), size)
+            self._slots = memoryview(self._file).cast('Q')
+        else:
+            self._slots = memoryview(bytearray(size)).cast('Q')
+
+    def _reset(self):
+        # A forked child records into its own file instead of the parent's.
+        self._slots = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def collect(self):
+        totals = array('Q', bytes(self.size * 8))
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, f'{self.layout}-*.bin')):
+                with open(path, 'rb') as f:
+                    values = array('Q', f.read())
+                if len(values) == len(totals):
+                    if not pid_alive(int(path.rsplit('-', 1)[-1][:-4])):
+                        for offset in self._gauges: values[offset] = 0
+                    for i, value in enumerate(values):
+                        if value: totals[i] += value
+        elif self._slots is not None:
+            totals = array('Q', self._slots.tobytes())
+        return totals
+
+    def exposition(self):
+        totals = self.collect()
+        lines = []
+        for family, (kind, help_text) in self.families.items():
+            lines += [f'# HELP {family} {help_text}', f'# TYPE {family} {kind}']
+            for (name, labels), offset in zip(self.series, self.offsets):
+                if name != family:
+                    continue
+                label_text = ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+                prefix = label_text + ',' if label_text else ''
+                suffix = '{' + label_text + '}' if label_text else ''
+                if kind == 'gauge':
+                    lines.append(f'{family}{suffix} {totals[offset]}')
+                    continue
+                slots = totals[offset:offset + SLOTS]
+                cumulative = 0
+                for bucket in range(OVERFLOW):
+                    cumulative += slots[bucket]
+                    lines.append(f'{family}_bucket{{{prefix}le="{bucket_upper_us(bucket) / 1e6:g}"}} {cumulative}')
+                cumulative += slots[OVERFLOW]
+                lines.append(f'{family}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+                lines.append(f'{family}_sum{suffix} {slots[OVERFLOW + 1] / 1e9:.9g}')
+                lines.append(f'{family}_count{suffix} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Histogram:
+    __slots__ = ('registry', 'offset')
+
+    def __init__(self, registry, offset):
+        self.registry = registry
+        self.offset = offset
+
+    def observe(self, seconds):
+        slots = self.registry._slots
+        if slots is None: slots = self.registry._open()
+        ns = int(seconds * 1e9)
+        slots[self.offset + bucket_index(ns // 1000)] += 1
+        slots[self.offset + OVERFLOW + 1] += ns
+
+    def time(self):
+        return Timer(self)
+
+class Gauge:
+    __slots__ = ('registry', 'offset')
+
+    def __init__(self, registry, offset):
+        self.registry = registry
+        self.offset = offset
+
+    def set(self, value):
+        slots = self.registry._slots
+        if slots is None: slots = self.registry._open()
+        slots[self.offset] = value
+
+class Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+def timed(histogram):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,185 @@
+import argparse
+import io
+import json
+import mmap
+import pickle
+import struct
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+BN_EPS = 1e-5
+
+# Folded weights can be saved as one flat file: magic, header length, a JSON
+# header with the layer shapes, then 64-byte aligned float32 weight and bias
+# arrays. Loading maps the file read-only and wraps it in numpy views, so
+# workers share a single page-cache copy of the weights.
+MAPPED_MAGIC = b'SPMLP001'
+MAPPED_HEADER = struct.Struct('<8sI')
+ALIGN = 64
+
+STORAGE_DTYPES = {
+    'FloatStorage': np.float32,
+    'DoubleStorage': np.float64,
+    'HalfStorage': np.float16,
+    'LongStorage': np.int64,
+    'IntStorage': np.int32
+}
+
+# ============================= STATE DICT LOADING =============================
+class StateDictUnpickler(pickle.Unpickler):
+    # Reads a torch.save() state_dict without torch. Only the handful of
+    # globals a plain tensor state_dict needs are allowed, so a tampered
+    # checkpoint cannot run arbitrary code on load.
+    def __init__(self, archive, root):
+        super().__init__(io.BytesIO(archive.read(root + 'data.pkl')))
+        self.archive = archive
+        self.root = root
+        self.storages = {}
+
+    def find_class(self, module, name):
+        if (module, name) == ('collections', 'OrderedDict'):
+            return OrderedDict
+        if (module, name) == ('torch._utils', '_rebuild_tensor_v2'):
+            return rebuild_tensor
+        if module == 'torch' and name in STORAGE_DTYPES:
+            return STORAGE_DTYPES[name]
+        raise pickle.UnpicklingError(f"unsupported global {module}.{name}")
+
+    def persistent_load(self, pid):
+        _, dtype, key, _, numel = pid
+        if key not in self.storages:
+            raw = self.archive.read(f"{self.root}data/{key}")
+            self.storages[key] = np.frombuffer(raw, dtype=np.dtype(dtype).newbyteorder('<'), count=numel)
+        return self.storages[key]
+
+def rebuild_tensor(storage, offset, size, stride, *_):
+    if not size:
+        return storage[offset].copy()
+    strides = [s * storage.itemsize for s in stride]
+    return np.lib.stride_tricks.as_strided(storage[offset:], shape=size, strides=strides).copy()
+
+def load_state_dict(path):
+    with zipfile.ZipFile(path) as archive:
+        pkl = next(n for n in archive.namelist() if n.endswith('/data.pkl') or n == 'data.pkl')
+        return StateDictUnpickler(archive, pkl[:-len('data.pkl')]).load()
+
+# ============================= LAYER FOLDING =============================
+def group_modules(state):
+    modules = {}
+    for key, value in state.items():
+        prefix, index, param = key.rsplit('.', 2)
+        modules.setdefault(int(index), {})[param] = value
+        modules[int(index)]['prefix'] = prefix
+    return sorted(modules.items())
+
+def fold_batchnorm(state, eps=BN_EPS):
+    # Collapses an nn.Sequential of Linear and BatchNorm1d layers into plain
+    # (weight, bias) pairs. A BatchNorm right after a Linear folds into that
+    # Linear; one separated from it by an activation folds into the input
+    # side of the next Linear instead, which is exact because BatchNorm in
+    # eval mode is a per-feature affine map.
+    layers = []
+    pending = None
+    last_linear = None
+    for index, params in group_modules(state):
+        if 'running_mean' in params:
+            scale = params['weight'] / np.sqrt(params['running_var'] + eps)
+            shift = params['bias'] - params['running_mean'] * scale
+            if last_linear == index - 1:
+                weight, bias = layers[-1]
+                layers[-1] = (weight * scale[:, None], bias * scale + shift)
+            else:
+                pending = (scale, shift)
+            continue
+        weight, bias = params['weight'].astype(np.float64), params['bias'].astype(np.float64)
+        if pending is not None:
+            scale, shift = pending
+            bias = bias + weight @ shift
+            weight = weight * scale[None, :]
+            pending = None
+        layers.append((weight, bias))
+        last_linear = index
+    if pending is not None:
+        raise ValueError("BatchNorm after the final Linear layer cannot be folded")
+    return [(np.ascontiguousarray(w.T, dtype=np.float32), b.astype(np.float32)) for w, b in layers]
+
+def load_mapped(path):
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _, size = MAPPED_HEADER.unpack_from(data)
+    shapes = json.loads(data[MAPPED_HEADER.size:MAPPED_HEADER.size + size])['layers']
+    pos = MAPPED_HEADER.size + size
+    layers = []
+    for n_in, n_out in shapes:
+        arrays = []
+        for shape in ((n_in, n_out), (n_out,)):
+            pos += -pos % ALIGN
+            count = int(np.prod(shape))
+            arrays.append(np.frombuffer(data, dtype='<f4', count=count, offset=pos).reshape(shape))
+            pos += 4 * count
+        layers.append(tuple(arrays))
+    return layers
+
+# ============================= INFERENCE =============================
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'leaky_relu': lambda x: np.where(x > 0, x, 0.01 * x),
+    'gelu': lambda x: 0.5 * x * (1 + np.tanh(0.7978845608 * (x + 0.044715 * x ** 3)))
+}
+
+class MLPScorer:
+    def __init__(self, layers, activation='relu'):
+        self.layers = layers
+        self.activation = ACTIVATIONS[activation]
+
+    @classmethod
+    def from_file(cls, path, activation='relu'):
+        with open(path, 'rb') as f:
+            mapped = f.read(len(MAPPED_MAGIC)) == MAPPED_MAGIC
+        return cls(load_mapped(path) if mapped else fold_batchnorm(load_state_dict(path)), activation)
+
+    def save(self, path):
+        header = json.dumps({'layers': [list(w.shape) for w, _ in self.layers]}).encode()
+        with open(path, 'wb') as f:
+            f.write(MAPPED_HEADER.pack(MAPPED_MAGIC, len(header)) + header)
+            for array in (a for layer in self.layers for a in layer):
+                f.write(b'\0' * (-f.tell() % ALIGN))
+                f.write(np.ascontiguousarray(array, dtype='<f4').tobytes())
+
+    @property
+    def n_features(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def n_classes(self):
+        return self.layers[-1][0].shape[1]
+
+    def logits(self, features):
+        x = np.asarray(features, dtype=np.float32).reshape(-1, self.n_features)
+        for weight, bias in self.layers[:-1]:
+            x = self.activation(x @ weight + bias)
+        weight, bias = self.layers[-1]
+        return x @ weight + bias
+
+    def predict_proba(self, features):
+        z = self.logits(features)
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict(self, features):
+        return self.logits(features).argmax(axis=1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold a torch state_dict into the memory-mapped weight format.")
+    parser.add_argument('input', help="state_dict saved with torch.save()")
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+    scorer = MLPScorer.from_file(args.input)
+    scorer.save(args.output)
+    print(f"{len(scorer.layers)} layers, {scorer.n_features} features -> {scorer.n_classes} classes -> {args.output}")
+
+if __name__ == '__main__':
+    main()
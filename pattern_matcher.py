@@ -0,0 +1,223 @@
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from itertools import islice, product
+
+FORMAT_VERSION = 1
+
+# Compact format: a header, then little-endian uint32 arrays
+#   edge_start[nodes+1]  edge_char[edges]  edge_target[edges]   (edges sorted by char)
+#   fail[nodes]  out_start[nodes+1]  out_pattern[outs]
+#   pattern_len[patterns]  pattern_offset[patterns+1]
+# and the UTF-8 pattern bytes. MappedAhoCorasick reads it through mmap, so
+# the automaton lives in the page cache, shared by every worker process,
+# instead of as millions of per-process dicts.
+COMPACT_MAGIC = b'SPACM001'
+COMPACT_HEADER = struct.Struct('<8sIIII')
+
+LEET = {'a': '4@', 'e': '3', 'i': '1!', 'l': '1', 'o': '0', 's': '5$', 't': '7', 'g': '9', 'b': '8'}
+KEYBOARD_ROWS = ["`1234567890-=", "qwertyuiop[]", "asdfghjkl;'", "zxcvbnm,./"]
+
+# ============================= AUTOMATON =============================
+class AhoCorasick:
+    # Finds every occurrence of every pattern in a single left-to-right pass.
+    # Each node's output list already includes the outputs reachable through
+    # its failure links, so matching never has to walk the suffix chain.
+    def __init__(self, patterns, goto, fail, out):
+        self.patterns = patterns
+        self.goto = goto
+        self.fail = fail
+        self.out = out
+
+    @classmethod
+    def build(cls, patterns):
+        patterns = list(dict.fromkeys(p for p in patterns if p))
+        goto, out = [{}], [[]]
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(index)
+
+        fail = [0] * len(goto)
+        pending = deque(goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for ch, child in goto[node].items():
+                pending.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0) if node else 0
+                out[child] = out[child] + out[fail[child]]
+        return cls(patterns, goto, fail, out)
+
+    def iter_matches(self, text):
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in out[node]:
+                pattern = patterns[index]
+                yield i - len(pattern) + 1, i + 1, pattern
+
+    def find_all(self, text):
+        return list(self.iter_matches(text))
+
+    def contains_any(self, text):
+        return next(self.iter_matches(text), None) is not None
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': FORMAT_VERSION, 'patterns': self.patterns, 'goto': self.goto,
+                       'fail': self.fail, 'out': self.out}, f, separators=(',', ':'))
+
+    def save_compact(self, path):
+        edge_start, edge_char, edge_target = array('I', [0]), array('I'), array('I')
+        for edges in self.goto:
+            for ch, target in sorted(edges.items()):
+                edge_char.append(ord(ch))
+                edge_target.append(target)
+            edge_start.append(len(edge_char))
+        out_start, out_pattern = array('I', [0]), array('I')
+        for outputs in self.out:
+            out_pattern.extend(outputs)
+            out_start.append(len(out_pattern))
+        encoded = [p.encode('utf-8') for p in self.patterns]
+        pattern_offset = array('I', [0])
+        for blob in encoded:
+            pattern_offset.append(pattern_offset[-1] + len(blob))
+        pattern_len = array('I', map(len, self.patterns))
+        arrays = [edge_start, edge_char, edge_target, array('I', self.fail), out_start, out_pattern,
+                  pattern_len, pattern_offset]
+        if sys.byteorder != 'little':
+            for a in arrays: a.byteswap()
+        with open(path, 'wb') as f:
+            f.write(COMPACT_HEADER.pack(COMPACT_MAGIC, len(self.goto), len(edge_char), len(out_pattern),
+                                        len(self.patterns)))
+            for a in arrays:
+                f.write(a.tobytes())
+            f.write(b''.join(encoded))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported automaton version {data.get('version')}")
+        return cls(data['patterns'], data['goto'], data['fail'], data['out'])
+
+class MappedAhoCorasick:
+    # Read-only automaton over a compact file; same matching API as AhoCorasick.
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, nodes, edges, outs, count = COMPACT_HEADER.unpack_from(self._data)
+        if magic != COMPACT_MAGIC:
+            raise ValueError(f"{path} is not a compact automaton")
+        if sys.byteorder != 'little':
+            raise ValueError("compact automata can only be mapped on little-endian hosts")
+        view = memoryview(self._data)
+        pos = COMPACT_HEADER.size
+
+        def take(n):
+            nonlocal pos
+            part = view[pos:pos + 4 * n].cast('I')
+            pos += 4 * n
+            return part
+
+        self.edge_start, self.edge_char, self.edge_target = take(nodes + 1), take(edges), take(edges)
+        self.fail, self.out_start, self.out_pattern = take(nodes), take(nodes + 1), take(outs)
+        self.pattern_len, self.pattern_offset = take(count), take(count + 1)
+        self._blob = pos
+        self.size = count
+
+    def pattern(self, index):
+        start = self._blob + self.pattern_offset[index]
+        return self._data[start:self._blob + self.pattern_offset[index + 1]].decode('utf-8')
+
+    def _step(self, node, code):
+        lo, hi = self.edge_start[node], self.edge_start[node + 1]
+        i = bisect_left(self.edge_char, code, lo, hi)
+        return self.edge_target[i] if i < hi and self.edge_char[i] == code else -1
+
+    def iter_matches(self, text):
+        fail, out_start, out_pattern, pattern_len = self.fail, self.out_start, self.out_pattern, self.pattern_len
+        step = self._step
+        node = 0
+        for i, ch in enumerate(text):
+            code = ord(ch)
+            nxt = step(node, code)
+            while nxt < 0 and node:
+                node = fail[node]
+                nxt = step(node, code)
+            node = max(nxt, 0)
+            for k in range(out_start[node], out_start[node + 1]):
+                index = out_pattern[k]
+                yield i - pattern_len[index] + 1, i + 1, self.pattern(index)
+
+    def find_all(self, text):
+        return list(self.iter_matches(text))
+
+    def contains_any(self, text):
+        return next(self.iter_matches(text), None) is not None
+
+def load_automaton(path):
+    with open(path, 'rb') as f:
+        magic = f.read(len(COMPACT_MAGIC))
+    return MappedAhoCorasick(path) if magic == COMPACT_MAGIC else AhoCorasick.load(path)
+
+# ============================= PATTERN SOURCES =============================
+def leet_variants(word, limit=16):
+    options = [(ch,) + tuple(LEET.get(ch, '')) for ch in word]
+    return [''.join(chars) for chars in islice(product(*options), limit)]
+
+def keyboard_walks(min_length=4):
+    walks = []
+    for row in KEYBOARD_ROWS:
+        for size in range(min_length, len(row) + 1):
+            for start in range(len(row) - size + 1):
+                walk = row[start:start + size]
+                walks += [walk, walk[::-1]]
+    return walks
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile weak-pattern word lists into a serialized automaton.")
+    parser.add_argument('inputs', nargs='*', default=['-'], help="word list files, or - for stdin")
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--leet', action='store_true', help="add leetspeak variants of each word")
+    parser.add_argument('--keyboard-walks', action='store_true', help="add QWERTY row walks of 4+ keys")
+    parser.add_argument('--min-length', type=int, default=3)
+    parser.add_argument('--compact', action='store_true', help="write the mmap-able binary format instead of JSON")
+    args = parser.parse_args(argv)
+
+    patterns = keyboard_walks() if args.keyboard_walks else []
+    for name in args.inputs:
+        src = sys.stdin if name == '-' else open(name, encoding='utf-8', errors='replace')
+        try:
+            for line in src:
+                word = line.strip().lower()
+                if len(word) < args.min_length:
+                    continue
+                patterns += leet_variants(word) if args.leet else [word]
+        finally:
+            if src is not sys.stdin: src.close()
+    automaton = AhoCorasick.build(patterns)
+    automaton.save_compact(args.output) if args.compact else automaton.save(args.output)
+    print(f"{len(automaton.patterns)} patterns, {len(automaton.goto)} states -> {args.output}")
+
+if __name__ == '__main__':
+    main()
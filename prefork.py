@@ -0,0 +1,184 @@
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Pre-fork launcher: the parent imports main and prewarms it, so every
+# read-only asset (breach corpus, pattern automaton, word list, model weights)
+# is loaded before any worker exists, then forks workers that serve from one shared
+# listening socket. Assets in the mmap formats (breach_corpus.py,
+# pattern_matcher.py --compact, wordlist.py, ml_scorer.py -o) live in the
+# page cache and are never copied. gc.freeze() keeps the collector from
+# touching, and so copying, the objects inherited from the parent.
+
+# ============================= LAUNCHER =============================
+def serve(host, port, workers, threaded=True):
+    from werkzeug.serving import make_server
+    import main
+
+    main.prewarm()
+    listener = socket.create_server((host, port), backlog=2048, reuse_port=False)
+    listener.set_inheritable(True)
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, exit_worker)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            server = make_server(host, port, main.app, threaded=threaded, fd=listener.fileno())
+            try:
+                server.serve_forever()
+            finally:
+                signal.signal(signal.SIGTERM, signal.SIG_IGN)
+                main.history_writer.close()
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def exit_worker(*_):
+        # Unwinds serve_forever, so the worker still flushes queued history.
+        raise SystemExit(0)
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"serving on http://{host}:{port} with {workers} workers (parent {os.getpid()})", file=sys.stderr, flush=True)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        # Replace crashed workers, but not ones that die straight after starting.
+        if not stopping and started is not None and time.monotonic() - started > 1:
+            spawn()
+
+# ============================= RSS BENCHMARK =============================
+def memory(pid):
+    # kB figures from smaps_rollup: Rss counts shared pages in full, Pss splits
+    # them between sharers, and private pages are what a worker alone costs.
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)}
+
+def children_of(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+def build_assets(directory, words=50000):
+    # A breach-pattern automaton large enough for its footprint to matter, in
+    # both formats, so the benchmark can show what sharing it saves.
+    from pattern_matcher import AhoCorasick
+    rnd = random.Random(11)
+    patterns = [''.join(rnd.choice(string.ascii_lowercase + string.digits) for _ in range(rnd.randint(5, 12)))
+                for _ in range(words)]
+    automaton = AhoCorasick.build(patterns)
+    automaton.save(os.path.join(directory, 'patterns.json'))
+    automaton.save_compact(os.path.join(directory, 'patterns.bin'))
+
+def warm(port, requests=200):
+    for i in range(requests):
+        body = json.dumps({'password': f'Warm-{i}-pass!'}).encode()
+        req = urllib.request.Request(f'http://127.0.0.1:{port}/check', body, {'Content-Type': 'application/json'})
+        urllib.request.urlopen(req).read()
+
+def rss_benchmark(counts, words):
+    workdir = tempfile.mkdtemp(prefix='prefork-bench-')
+    report = []
+    try:
+        build_assets(workdir, words)
+        for fmt in ('json', 'bin'):
+            for workers in counts:
+                with socket.socket() as s:
+                    s.bind(('127.0.0.1', 0))
+                    port = s.getsockname()[1]
+                env = dict(os.environ, BREACH_PATTERNS=os.path.join(workdir, f'patterns.{fmt}'),
+                           PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+                proc = subprocess.Popen([sys.executable, os.path.join(ROOT, 'prefork.py'), '--port', str(port),
+                                         '--workers', str(workers)], cwd=workdir, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    deadline = time.monotonic() + 60
+                    while len(children_of(proc.pid)) < workers or not ready(port):
+                        if time.monotonic() > deadline: raise RuntimeError("launcher did not start")
+                        time.sleep(0.2)
+                    # Enough requests that every worker has run the scoring path.
+                    warm(port, 100 * workers)
+                    stats = [memory(pid) for pid in children_of(proc.pid)]
+                    parent = memory(proc.pid)
+                finally:
+                    proc.terminate()
+                    proc.wait()
+                row = {
+                    'assets': 'mmap' if fmt == 'bin' else 'heap',
+                    'workers': workers,
+                    'worker_rss_mb': round(sum(s['rss'] for s in stats) / len(stats) / 1024, 1),
+                    'worker_private_mb': round(sum(s['private'] for s in stats) / len(stats) / 1024, 1),
+                    'total_pss_mb': round((parent['pss'] + sum(s['pss'] for s in stats)) / 1024, 1)
+                }
+                report.append(row)
+                print(f"{row['assets']:5} {workers:3} workers  rss/worker {row['worker_rss_mb']:7.1f} MB  "
+                      f"private/worker {row['worker_private_mb']:7.1f} MB  total pss {row['total_pss_mb']:7.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def ready(port):
+    try:
+        urllib.request.urlopen(f'http://127.0.0.1:{port}/api/cache', timeout=1).read()
+        return True
+    except OSError:
+        return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve main.py from pre-forked workers that share read-only assets.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--no-threads', action='store_true', help="one request at a time per worker")
+    parser.add_argument('--bench-rss', metavar='COUNTS', help="measure memory per worker for e.g. 1,2,4,8 workers")
+    parser.add_argument('--bench-words', type=int, default=50000, help="patterns in the benchmark automaton")
+    parser.add_argument('-o', '--output', help="write the benchmark report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.bench_rss:
+        report = rss_benchmark([int(n) for n in args.bench_rss.split(',')], args.bench_words)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return
+    serve(args.host, args.port, args.workers, not args.no_threads)
+
+if __name__ == '__main__':
+    main()
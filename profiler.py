@@ -0,0 +1,148 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# (module, co_name) of the leaf frame of a background thread that is blocked
+# waiting for work: Condition.wait, which Event.wait and queue.Queue.get end
+# in. co_name rather than co_qualname, which only exists from Python 3.11.
+IDLE_FRAMES = {('threading', 'wait')}
+
+# ============================= SAMPLING PROFILER =============================
+class SamplingProfiler:
+    # Statistical profiler for live traffic. While a session runs, a fraction of
+    # requests register their thread, and a background thread snapshots those
+    # threads' stacks every `interval` seconds with sys._current_frames(). When
+    # no session is running, request hooks only read `active`, so the cost is
+    # one attribute check per request and no sampling thread exists.
+    #
+    # Threads named in `threads` (e.g. the history writer, which runs the
+    # SQLite inserts off the request path) are sampled for the whole session,
+    # skipping samples where they are idle.
+    def __init__(self, focus=(), output_dir=None, threads=()):
+        self.focus = tuple(focus)
+        self.threads = tuple(threads)
+        self.output_dir = output_dir
+        self.active = False
+        self.fraction = 0.0
+        self.last = None
+        self._targets = set()
+        self._lock = threading.Lock()
+        self._session = None
+
+    def start(self, seconds=30.0, fraction=0.1, interval=0.005):
+        with self._lock:
+            if self.active:
+                return False
+            self._targets.clear()
+            self.fraction = fraction
+            self._session = {'started': time.time(), 'seconds': seconds, 'interval': interval,
+                             'stacks': Counter(), 'samples': 0, 'requests': 0}
+            self.active = True
+        threading.Thread(target=self._run, args=(self._session,), name='sampling-profiler', daemon=True).start()
+        return True
+
+    def track(self):
+        # Called at request start; returns True if this request is sampled.
+        if not self.active or random.random() >= self.fraction:
+            return False
+        with self._lock:
+            if not self.active: return False
+            self._targets.add(threading.get_ident())
+            self._session['requests'] += 1
+        return True
+
+    def untrack(self):
+        self._targets.discard(threading.get_ident())
+
+    def status(self):
+        session = self._session
+        status = {'active': self.active, 'fraction': self.fraction, 'pid': os.getpid()}
+        if self.active and session:
+            status.update(samples=session['samples'], requests=session['requests'],
+                          remaining=round(max(0.0, session['started'] + session['seconds'] - time.time()), 1))
+        if self.last:
+            status['last'] = {k: v for k, v in self.last.items() if k != 'collapsed'}
+        return status
+
+    def _run(self, session):
+        deadline = time.monotonic() + session['seconds']
+        interval, stacks = session['interval'], session['stacks']
+        me = threading.get_ident()
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            targets = tuple(self._targets)
+            background = [t.ident for t in threading.enumerate() if t.name in self.threads] if self.threads else []
+            if not targets and not background: continue
+            frames = sys._current_frames()
+            for ident in targets + tuple(background):
+                frame = frames.get(ident)
+                if frame is None or ident == me: continue
+                if ident in background and is_idle(frame): continue
+                stacks[collapse(frame)] += 1
+                session['samples'] += 1
+        with self._lock:
+            self.active = False
+            self._targets.clear()
+        self.last = self._report(session)
+
+    def _report(self, session):
+        stacks, interval = session['stacks'], session['interval']
+        collapsed = ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+        report = {
+            'started': session['started'],
+            'seconds': session['seconds'],
+            'interval_ms': interval * 1000,
+            'requests': session['requests'],
+            'samples': session['samples'],
+            'functions': breakdown(stacks, interval),
+            'focus': breakdown(stacks, interval, self.focus),
+            'collapsed': collapsed
+        }
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f'profile-{os.getpid()}-{int(session["started"])}.folded')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(collapsed)
+            report['path'] = path
+        return report
+
+def is_idle(frame):
+    return (frame.f_globals.get('__name__'), frame.f_code.co_name) in IDLE_FRAMES
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def collapse(frame):
+    # Root-first, semicolon-separated: the input format of flamegraph.pl and speedscope.
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def short_name(name):
+    # "module:Class.method" -> "method". frame_name records co_qualname where
+    # it exists, and focus lists name functions by co_name, as on every Python.
+    return name.rsplit(':', 1)[-1].rsplit('.', 1)[-1]
+
+def breakdown(stacks, interval, only=None, limit=40):
+    # Per-function estimated time: "self" when the function was the leaf of a
+    # sample, "total" when it appeared anywhere in the stack (counted once per
+    # sample even if recursive).
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        names = stack.split(';')
+        own[names[-1]] += count
+        for name in set(names):
+            total[name] += count
+    if only:
+        only = {short_name(name) for name in only}
+        names = [name for name in total if short_name(name) in only]
+    else:
+        names = [name for name, _ in total.most_common(limit)]
+    return {name: {'self_ms': round(own[name] * interval * 1000, 1), 'total_ms': round(total[name] * interval * 1000, 1),
+                   'samples': total[name]} for name in names}
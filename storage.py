@@ -0,0 +1,597 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import string
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Check history and favorites live behind one small interface so the app can
+# run where a local SQLite file is the wrong fit (e.g. Vercel, whose
+# filesystem is ephemeral and per instance):
+#   add_checks(rows)               rows of (password, strength, label, entropy)
+#   add_favorite(password)
+#   history_page(limit, before)    -> ([(password, strength, label, entropy, timestamp)], next_cursor)
+#   favorites_page(limit, before)  -> ([(password, created)], next_cursor)
+#   counts()                       -> (checks, favorites)
+#   seen(password)                 -> how many times it has been checked
+#   clear_history()
+#   close()
+#   hashed                         True when pages show None in place of passwords
+# Pages are newest first. `before` is the (timestamp, id) of the last row of
+# the previous page and next_cursor is "<timestamp>,<id>", or None on the
+# last page. Timestamps are UTC "YYYY-MM-DD HH:MM:SS", as SQLite's
+# CURRENT_TIMESTAMP writes them.
+
+def utc_stamp():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+# ============================= SQLITE =============================
+class ConnectionPool:
+    # Long-lived connections shared by request threads. Each one is borrowed
+    # for a single transaction and handed back, so there is no connect/close
+    # per call. The pool is rebuilt after a fork so workers never share a
+    # handle with their parent.
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue(maxsize=self.size)
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# Each entry upgrades the schema by one version; PRAGMA user_version records
+# how far an existing database file has been migrated.
+MIGRATIONS = [
+    [
+        "CREATE INDEX IF NOT EXISTS idx_checks_timestamp ON checks (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_favorites_created ON favorites (created, id)",
+    ],
+    [
+        "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)",
+        "INSERT OR REPLACE INTO counters (name, value) SELECT 'checks', COUNT(*) FROM checks",
+        "INSERT OR REPLACE INTO counters (name, value) SELECT 'favorites', COUNT(*) FROM favorites",
+        "CREATE TRIGGER IF NOT EXISTS checks_count_insert AFTER INSERT ON checks "
+        "BEGIN UPDATE counters SET value = value + 1 WHERE name = 'checks'; END",
+        "CREATE TRIGGER IF NOT EXISTS checks_count_delete AFTER DELETE ON checks "
+        "BEGIN UPDATE counters SET value = value - 1 WHERE name = 'checks'; END",
+        "CREATE TRIGGER IF NOT EXISTS favorites_count_insert AFTER INSERT ON favorites "
+        "BEGIN UPDATE counters SET value = value + 1 WHERE name = 'favorites'; END",
+        "CREATE TRIGGER IF NOT EXISTS favorites_count_delete AFTER DELETE ON favorites "
+        "BEGIN UPDATE counters SET value = value - 1 WHERE name = 'favorites'; END",
+    ],
+]
+
+def init_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS checks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            password TEXT NOT NULL,
+            strength INTEGER,
+            label TEXT,
+            entropy REAL,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS favorites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            password TEXT NOT NULL,
+            created TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    migrate_db(conn)
+    conn.close()
+
+def migrate_db(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, statements in enumerate(MIGRATIONS[version:], version + 1):
+        with conn:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {number}')
+
+def _keyset_page(conn, columns, table, order_col, limit, before):
+    select = f"SELECT {columns}, {order_col}, id FROM {table}"
+    if before is None:
+        rows = conn.execute(f"{select} ORDER BY {order_col} DESC, id DESC LIMIT ?", (limit,)).fetchall()
+    else:
+        # SQLite only seeks on the first column of "(timestamp, id) < (?, ?)"
+        # and then scans every row sharing the cursor's timestamp, which a
+        # burst of batched inserts makes thousands. Two seeks avoid that.
+        stamp, row_id = before
+        rows = conn.execute(f"{select} WHERE {order_col} = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                            (stamp, row_id, limit)).fetchall()
+        if len(rows) < limit:
+            rows += conn.execute(f"{select} WHERE {order_col} < ? ORDER BY {order_col} DESC, id DESC LIMIT ?",
+                                 (stamp, limit - len(rows))).fetchall()
+    next_cursor = f"{rows[-1][-2]},{rows[-1][-1]}" if len(rows) == limit else None
+    return [row[:-2] for row in rows], next_cursor
+
+class SQLiteStore:
+    # WAL mode, synchronous=NORMAL, pooled connections, keyset pagination
+    # over (timestamp, id) indexes and trigger-maintained row counters.
+    # Opening it creates or migrates the schema. seen() scans the checks
+    # table unless seen_index is set, which indexes the password column: a
+    # second plaintext copy of every check, built on first open, so it is
+    # opt-in. HashedSQLiteStore gets the same lookup from its digest column.
+    hashed = False
+
+    def __init__(self, path, seen_index=False):
+        self.path = path
+        init_db(path)
+        if seen_index:
+            conn = sqlite3.connect(path)
+            with conn:
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_checks_password ON checks (password)")
+            conn.close()
+        self.pool = ConnectionPool(path)
+
+    def add_checks(self, rows):
+        with self.pool.connection() as conn:
+            conn.executemany("INSERT INTO checks (password, strength, label, entropy) VALUES (?, ?, ?, ?)", rows)
+
+    def add_favorite(self, password):
+        with self.pool.connection() as conn:
+            conn.execute("INSERT INTO favorites (password) VALUES (?)", (password,))
+
+    def history_page(self, limit=100, before=None):
+        with self.pool.connection() as conn:
+            return _keyset_page(conn, "password, strength, label, entropy, timestamp", "checks", "timestamp",
+                                limit, before)
+
+    def favorites_page(self, limit=20, before=None):
+        with self.pool.connection() as conn:
+            return _keyset_page(conn, "password, created", "favorites", "created", limit, before)
+
+    def counts(self):
+        with self.pool.connection() as conn:
+            counts = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return counts.get('checks', 0), counts.get('favorites', 0)
+
+    def seen(self, password):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM checks WHERE password = ?", (password,)).fetchone()[0]
+
+    def clear_history(self):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM checks")
+
+    def close(self):
+        self.pool.close()
+
+# ============================= HASHED SQLITE =============================
+DIGEST_SIZE = 16
+
+HASHED_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS checks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        digest BLOB NOT NULL UNIQUE,
+        strength INTEGER,
+        label TEXT,
+        entropy REAL,
+        uses INTEGER NOT NULL DEFAULT 1,
+        first_seen TEXT DEFAULT CURRENT_TIMESTAMP,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS favorites (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        digest BLOB NOT NULL UNIQUE,
+        created TEXT DEFAULT CURRENT_TIMESTAMP
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_checks_timestamp ON checks (timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_favorites_created ON favorites (created, id)",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)",
+    "INSERT OR IGNORE INTO counters (name, value) VALUES ('checks', 0), ('favorites', 0)",
+]
+
+class HashedSQLiteStore:
+    # Same tuned SQLite setup, but no plaintext: each password is stored as
+    # a 16-byte keyed BLAKE2b digest. The digest is UNIQUE, so a repeated
+    # check bumps `uses` and refreshes the row's score and timestamp instead
+    # of adding a row, and seen() is one index probe. Pages show None where
+    # the password would be; a saved favorite can no longer be read back.
+    # counts() reports every check, repeats included, and distinct favorites.
+    # The key must stay the same for the life of the file and should not
+    # live next to it, or anyone holding both can test guesses.
+    hashed = True
+
+    def __init__(self, path, key):
+        if not key:
+            raise ValueError("the hashed history store needs a key (HISTORY_KEY)")
+        self.path = path
+        self.key = key
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            for statement in HASHED_SCHEMA:
+                conn.execute(statement)
+        conn.close()
+        self.pool = ConnectionPool(path)
+
+    def digest(self, password):
+        return hashlib.blake2b(password.encode('utf-8', 'surrogatepass'), key=self.key, digest_size=DIGEST_SIZE).digest()
+
+    def add_checks(self, rows):
+        stamp = utc_stamp()
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO checks (digest, strength, label, entropy, first_seen, timestamp) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (digest) DO UPDATE SET uses = uses + 1, strength = excluded.strength, "
+                "label = excluded.label, entropy = excluded.entropy, timestamp = excluded.timestamp",
+                [(self.digest(password), strength, label, entropy, stamp, stamp)
+                 for password, strength, label, entropy in rows])
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = 'checks'", (len(rows),))
+
+    def add_favorite(self, password):
+        digest, stamp = self.digest(password), utc_stamp()
+        with self.pool.connection() as conn:
+            if conn.execute("INSERT OR IGNORE INTO favorites (digest, created) VALUES (?, ?)", (digest, stamp)).rowcount:
+                conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'favorites'")
+            else:
+                conn.execute("UPDATE favorites SET created = ? WHERE digest = ?", (stamp, digest))
+
+    def history_page(self, limit=100, before=None):
+        with self.pool.connection() as conn:
+            return _keyset_page(conn, "NULL, strength, label, entropy, timestamp", "checks",
+                                "timestamp", limit, before)
+
+    def favorites_page(self, limit=20, before=None):
+        with self.pool.connection() as conn:
+            return _keyset_page(conn, "NULL, created", "favorites", "created", limit, before)
+
+    def counts(self):
+        with self.pool.connection() as conn:
+            counts = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return counts.get('checks', 0), counts.get('favorites', 0)
+
+    def seen(self, password):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT uses FROM checks WHERE digest = ?", (self.digest(password),)).fetchone()
+        return row[0] if row else 0
+
+    def clear_history(self):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM checks")
+            conn.execute("UPDATE counters SET value = 0 WHERE name = 'checks'")
+
+    def close(self):
+        self.pool.close()
+
+# ============================= IN MEMORY =============================
+def _page(rows, limit, before):
+    # rows are in (timestamp, id) order and end with those two fields.
+    end = len(rows)
+    if before is not None:
+        lo, hi = 0, end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tuple(rows[mid][-2:]) < tuple(before): lo = mid + 1
+            else: hi = mid
+        end = lo
+    page = [rows[i] for i in range(end - 1, max(end - limit, 0) - 1, -1)]
+    next_cursor = f"{page[-1][-2]},{page[-1][-1]}" if page and len(page) == limit else None
+    return [row[:-1] for row in page], next_cursor
+
+class MemoryStore:
+    # Ring buffers in process memory: no I/O at all, and the newest
+    # `capacity` checks and `favorites_capacity` favorites are kept, older
+    # ones fall off. Counts are of what is retained. Nothing survives a
+    # restart and every process has its own copy.
+    hashed = False
+
+    def __init__(self, capacity=10000, favorites_capacity=1000):
+        self.checks = deque(maxlen=capacity)
+        self.favorites = deque(maxlen=favorites_capacity)
+        self._next_id = 1
+        self._last_stamp = ''
+        self._lock = threading.Lock()
+
+    def _stamp(self):
+        # Never earlier than the previous row, so insertion order is page order.
+        self._last_stamp = max(utc_stamp(), self._last_stamp)
+        return self._last_stamp
+
+    def _take_id(self):
+        self._next_id += 1
+        return self._next_id - 1
+
+    def add_checks(self, rows):
+        with self._lock:
+            stamp = self._stamp()
+            for password, strength, label, entropy in rows:
+                self.checks.append((password, strength, label, entropy, stamp, self._take_id()))
+
+    def add_favorite(self, password):
+        with self._lock:
+            self.favorites.append((password, self._stamp(), self._take_id()))
+
+    def history_page(self, limit=100, before=None):
+        with self._lock:
+            return _page(self.checks, limit, before)
+
+    def favorites_page(self, limit=20, before=None):
+        with self._lock:
+            return _page(self.favorites, limit, before)
+
+    def counts(self):
+        return len(self.checks), len(self.favorites)
+
+    def seen(self, password):
+        # A scan of the retained checks; only the SQLite stores index it.
+        with self._lock:
+            return sum(1 for row in self.checks if row[0] == password)
+
+    def clear_history(self):
+        with self._lock:
+            self.checks.clear()
+
+    def close(self):
+        pass
+
+# ============================= APPEND-ONLY LOG =============================
+class LogStore(MemoryStore):
+    # A MemoryStore backed by an append-only JSON-lines file, for hosts
+    # where the only writable place is a scratch directory such as /tmp:
+    #   ["c", id, timestamp, password, strength, label, entropy]   a check
+    #   ["f", id, timestamp, password]                             a favorite
+    #   ["x"]                                                      history cleared
+    # Opening replays the file; a torn last line from a crash is cut off.
+    # Writes are one append per batch. Once the file holds more dead records
+    # (cleared or past `retain`) than live ones, and at least compact_min, it
+    # is rewritten with only the live records and atomically swapped in.
+    # One process per file: other processes do not see its appends.
+    def __init__(self, path, retain=100000, compact_min=10000, fsync=False):
+        super().__init__(retain, None)
+        self.path = path
+        self.compact_min = compact_min
+        self.fsync = fsync
+        self.records = 0
+        self.compactions = 0
+        self._replay()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r+b') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data): f.truncate(end)
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            self.records += 1
+            if record[0] == 'x':
+                self.checks.clear()
+                continue
+            if record[0] == 'c':
+                _, row_id, stamp, password, strength, label, entropy = record
+                self.checks.append((password, strength, label, entropy, stamp, row_id))
+            else:
+                _, row_id, stamp, password = record
+                self.favorites.append((password, stamp, row_id))
+            self._next_id = max(self._next_id, row_id + 1)
+            self._last_stamp = max(self._last_stamp, stamp)
+
+    def _append(self, records):
+        self._file.write(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records))
+        self._file.flush()
+        if self.fsync: os.fsync(self._file.fileno())
+        self.records += len(records)
+        if self.records - self.live() >= max(self.live(), self.compact_min): self._compact()
+
+    def live(self):
+        return len(self.checks) + len(self.favorites)
+
+    def add_checks(self, rows):
+        with self._lock:
+            stamp = self._stamp()
+            records = []
+            for password, strength, label, entropy in rows:
+                row_id = self._take_id()
+                self.checks.append((password, strength, label, entropy, stamp, row_id))
+                records.append(['c', row_id, stamp, password, strength, label, entropy])
+            self._append(records)
+
+    def add_favorite(self, password):
+        with self._lock:
+            row_id, stamp = self._take_id(), self._stamp()
+            self.favorites.append((password, stamp, row_id))
+            self._append([['f', row_id, stamp, password]])
+
+    def clear_history(self):
+        with self._lock:
+            self.checks.clear()
+            self._append([['x']])
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        # Records are rewritten in id order so a replay rebuilds the same state.
+        live = [['c', row[5], row[4]] + list(row[:4]) for row in self.checks]
+        live += [['f', row[2], row[1], row[0]] for row in self.favorites]
+        live.sort(key=lambda record: record[1])
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in live))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.records = len(live)
+        self.compactions += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def open_store(spec=None, key=None, seen_index=False):
+    # "sqlite:<path>" (the default), "hashed:<path>" (needs key), "memory[:<capacity>]" or "log:<path>".
+    kind, _, arg = (spec or 'sqlite').partition(':')
+    if kind == 'sqlite':
+        return SQLiteStore(arg or 'securepass_history.db', seen_index)
+    if kind == 'hashed':
+        return HashedSQLiteStore(arg or 'securepass_hashed.db', key)
+    if kind == 'memory':
+        return MemoryStore(int(arg) if arg else 10000)
+    if kind == 'log':
+        return LogStore(arg or os.path.join(tempfile.gettempdir(), 'securepass-history.log'))
+    raise ValueError(f"unknown history store {spec!r}")
+
+# ============================= THROUGHPUT =============================
+def throughput(rows=50000, batch=200, pages=2000):
+    report = {}
+    directory = tempfile.mkdtemp(prefix='store-bench-')
+    try:
+        backends = {
+            'memory': lambda: MemoryStore(rows),
+            'sqlite': lambda: SQLiteStore(os.path.join(directory, 'bench.db')),
+            'hashed': lambda: HashedSQLiteStore(os.path.join(directory, 'hashed.db'), b'bench-key' * 4),
+            'log': lambda: LogStore(os.path.join(directory, 'bench.log'), retain=rows)
+        }
+        data = [(f'Bench-{i}-pw!', i % 101, 'Medium', 40.5) for i in range(rows)]
+        for name, make in backends.items():
+            store = make()
+            start = time.perf_counter()
+            for i in range(0, rows, batch):
+                store.add_checks(data[i:i + batch])
+            insert = time.perf_counter() - start
+            start = time.perf_counter()
+            for i in range(1000):
+                store.add_favorite(f'fav-{i}')
+            favorite = (time.perf_counter() - start) / 1000
+            start = time.perf_counter()
+            for _ in range(pages):
+                store.history_page(100)
+            first = (time.perf_counter() - start) / pages
+            # A cursor half way down, as a user paging far back would send.
+            stamp, _, row_id = store.history_page(rows // 2)[1].rpartition(',')
+            start = time.perf_counter()
+            for _ in range(pages):
+                store.history_page(100, (stamp, int(row_id)))
+            deep = (time.perf_counter() - start) / pages
+            start = time.perf_counter()
+            for _ in range(pages):
+                store.counts()
+            counts = (time.perf_counter() - start) / pages
+            lookups = max(10, pages // 100)
+            start = time.perf_counter()
+            for i in range(lookups):
+                store.seen(data[i * rows // lookups][0])
+            seen = (time.perf_counter() - start) / lookups
+            store.close()
+            start = time.perf_counter()
+            make().close()
+            reopen = time.perf_counter() - start
+            report[name] = {'insert_rows_per_sec': round(rows / insert), 'add_favorite_us': round(favorite * 1e6, 1),
+                            'first_page_us': round(first * 1e6, 1), 'deep_page_us': round(deep * 1e6, 1),
+                            'counts_us': round(counts * 1e6, 1), 'seen_us': round(seen * 1e6, 1),
+                            'open_ms': round(reopen * 1000, 1)}
+            r = report[name]
+            print(f"{name:7} insert {r['insert_rows_per_sec']:>9,} rows/s  favorite {r['add_favorite_us']:8.1f}us  "
+                  f"page {r['first_page_us']:7.1f}us  deep page {r['deep_page_us']:7.1f}us  "
+                  f"counts {r['counts_us']:6.1f}us  seen {r['seen_us']:8.1f}us  open {r['open_ms']:7.1f}ms",
+                  file=sys.stderr)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return report
+
+def disk_size(path):
+    # Checkpoint and vacuum first so the figure is the data, not WAL slack.
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('VACUUM')
+    conn.close()
+    return sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+
+def size_report(checks=200000, distinct=40000, batch=200):
+    # Keystroke-style history: a Zipf-like mix where a few passwords are
+    # checked again and again, as they are while a user edits one.
+    rnd = random.Random(13)
+    alphabet = string.ascii_letters + string.digits + '!@#$%^&*'
+    passwords = [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(8, 24))) for _ in range(distinct)]
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    stream = [(pw, len(pw) * 4, 'Strong', len(pw) * 5.95) for pw in rnd.choices(passwords, weights, k=checks)]
+    report = {}
+    directory = tempfile.mkdtemp(prefix='store-size-')
+    try:
+        for name, store in (('sqlite', SQLiteStore(os.path.join(directory, 'plain.db'))),
+                            ('hashed', HashedSQLiteStore(os.path.join(directory, 'hashed.db'), b'size-key' * 4))):
+            for i in range(0, checks, batch):
+                store.add_checks(stream[i:i + batch])
+            with store.pool.connection() as conn:
+                rows = conn.execute("SELECT COUNT(*) FROM checks").fetchone()[0]
+            store.close()
+            size = disk_size(store.path)
+            report[name] = {'checks': checks, 'rows': rows, 'bytes': size, 'bytes_per_check': round(size / checks, 1)}
+            print(f"{name:7} {checks:,} checks -> {rows:>8,} rows  {size / 1e6:8.2f} MB  "
+                  f"{size / checks:6.1f} bytes/check", file=sys.stderr)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    report['reduction'] = round(1 - report['hashed']['bytes'] / report['sqlite']['bytes'], 3)
+    print(f"hashed store is {report['reduction']:.1%} smaller", file=sys.stderr)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the history store backends.")
+    parser.add_argument('command', choices=['bench', 'size'])
+    parser.add_argument('--rows', type=int, default=50000, help="checks inserted by the benchmark")
+    parser.add_argument('--distinct', type=int, default=40000, help="distinct passwords in the size workload")
+    parser.add_argument('-o', '--output', help="write the benchmark report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == 'size':
+        report = size_report(args.rows, args.distinct)
+    else:
+        report = throughput(args.rows)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# main opens its history store on first use, relative to the working
+# directory by default. Point it at a scratch file before any test imports
+# main so the suite never writes to a real database.
+os.environ['HISTORY_STORE'] = 'sqlite:' + os.path.join(tempfile.mkdtemp(prefix='securepass-tests-'), 'history.db')
+for name in ('HISTORY_KEY', 'HISTORY_SEEN_INDEX', 'PREWARM', 'ML_SCORER', 'BREACH_CORPUS', 'BREACH_PATTERNS',
+             'PROFILE_SIGNAL'):
+    os.environ.pop(name, None)
@@ -0,0 +1,22 @@
+import io
+import json
+import sys
+
+import audit
+import main
+
+def test_audit_scores_a_file(tmp_path):
+    src, out = tmp_path / 'passwords.txt', tmp_path / 'report.csv'
+    src.write_text('password123\n\nCorrect-Horse-Battery-9\r\n', encoding='utf-8')
+    audit.main([str(src), '-o', str(out), '--format', 'csv', '--chunk-size', '1'])
+    lines = out.read_text(encoding='utf-8').splitlines()
+    assert lines[0] == ','.join(audit.FIELDS) and len(lines) == 3
+    assert [line.split(',')[0] for line in lines[1:]] == ['1', '3'], "blank lines are skipped, numbering is kept"
+
+def test_audit_reads_undecodable_stdin(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(b'caf\xe9-latin1\nletmein\n'), encoding='utf-8'))
+    out = tmp_path / 'report.jsonl'
+    audit.main(['-', '-o', str(out), '--show-passwords'])
+    rows = [json.loads(line) for line in out.read_text(encoding='utf-8').splitlines()]
+    assert [row['password'] for row in rows] == ['caf\ufffd-latin1', 'letmein']
+    assert rows[1]['breached'] and rows[1]['strength'] == main.calculate_strength('letmein')[0]
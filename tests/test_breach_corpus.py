@@ -0,0 +1,43 @@
+import hashlib
+import os
+
+import breach_corpus
+from breach_corpus import BreachCorpus, build
+
+def sha1_line(password, count=None):
+    digest = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+    return digest if count is None else f'{digest}:{count}'
+
+def test_build_and_lookup_round_trip(tmp_path):
+    prefix = str(tmp_path / 'breach')
+    passwords = [f'leaked-{i}' for i in range(50)]
+    lines = [pw + '\n' for pw in passwords[:25]]
+    lines += [sha1_line(pw, i) + '\r\n' for i, pw in enumerate(passwords[25:])]
+    # The same entries again, in both forms, land in other runs and must collapse.
+    lines += [sha1_line(pw) + '\n' for pw in passwords[:10]] + ['\n'] + [pw + '\n' for pw in passwords[40:]]
+    assert build(lines, prefix, run_size=7) == 50
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.run')], "runs must be cleaned up"
+    assert os.path.getsize(prefix + '.sha1') == 50 * breach_corpus.DIGEST_SIZE
+    corpus = BreachCorpus(prefix)
+    assert len(corpus) == 50
+    assert all(pw in corpus for pw in passwords)
+    assert 'not-leaked' not in corpus and 'leaked-50' not in corpus
+    corpus.close()
+
+def test_empty_corpus(tmp_path):
+    prefix = str(tmp_path / 'empty')
+    assert build(['\n', ''], prefix) == 0
+    assert os.path.getsize(prefix + '.sha1') == 0
+    corpus = BreachCorpus(prefix)
+    assert len(corpus) == 0 and 'anything' not in corpus
+    corpus.close()
+
+def test_cli_builds_a_corpus(tmp_path, capsys):
+    source = tmp_path / 'list.txt'
+    source.write_text('hunter2\nhunter2\n' + sha1_line('letmein', 3) + '\n', encoding='utf-8')
+    prefix = str(tmp_path / 'cli')
+    breach_corpus.main([str(source), '-o', prefix, '--run-size', '1'])
+    assert capsys.readouterr().out.startswith('2 unique entries')
+    corpus = BreachCorpus(prefix)
+    assert 'hunter2' in corpus and 'letmein' in corpus and 'Hunter2' not in corpus
+    corpus.close()
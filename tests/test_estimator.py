@@ -0,0 +1,20 @@
+import time
+
+import estimator
+
+def test_only_the_first_max_length_characters_are_scored():
+    password = ('Tr0ub4dor&3' * 400)[:4000]
+    assert estimator.estimate(password) == estimator.estimate(password[:estimator.MAX_LENGTH])
+
+def test_long_input_is_cheap():
+    start = time.perf_counter()
+    estimator.guesses_log10('1' * 4000)
+    estimator.guesses_log10(''.join(chr(33 + i * 7 % 94) for i in range(4000)))
+    assert time.perf_counter() - start < 0.5
+
+def test_known_shapes():
+    assert estimator.guesses_log10('password') < 1
+    assert estimator.guesses_log10('aaaaaaaaaaaa') < 3
+    assert estimator.guesses_log10('19901231') < 6
+    sequence = estimator.estimate('password1990')['sequence']
+    assert [piece['pattern'] for piece in sequence] == ['dictionary', 'date']
@@ -0,0 +1,62 @@
+import math
+from collections import Counter
+
+import pytest
+
+import main
+
+def chi_square_limit(df, z=4.75):
+    # Wilson-Hilferty approximation of the chi-square quantile; z=4.75 puts
+    # a false failure at about one in a million runs.
+    return df * (1 - 2 / (9 * df) + z * math.sqrt(2 / (9 * df))) ** 3
+
+def chi_square(counts, alphabet):
+    expected = sum(counts.values()) / len(alphabet)
+    return sum((counts[ch] - expected) ** 2 / expected for ch in alphabet)
+
+OPTIONS = [{}, {'symbols': False}, {'upper': False, 'lower': False, 'symbols': False}, {'digits': False, 'lower': False}]
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_characters_are_uniform(options):
+    alphabet = main.password_charset(**{key: options.get(key, True) for key in ('upper', 'lower', 'digits', 'symbols')})
+    counts = Counter(''.join(main.generate_passwords(5000, 20, **options)))
+    assert set(counts) <= set(alphabet)
+    assert chi_square(counts, alphabet) < chi_square_limit(len(alphabet) - 1)
+
+def test_positions_are_uniform():
+    # Every position draws from the same distribution, including the ones
+    # that straddle the random blocks the generator reads.
+    alphabet = main.password_charset()
+    passwords = list(main.generate_passwords(20000, 7))
+    for position in range(7):
+        counts = Counter(pw[position] for pw in passwords)
+        assert chi_square(counts, alphabet) < chi_square_limit(len(alphabet) - 1), position
+
+def test_count_and_length():
+    passwords = list(main.generate_passwords(1000, 33))
+    assert len(passwords) == 1000 and {len(pw) for pw in passwords} == {33}
+
+@pytest.mark.parametrize('length', [0, -1])
+def test_non_positive_length_is_rejected(length):
+    with pytest.raises(ValueError):
+        next(main.generate_passwords(1, length))
+
+@pytest.mark.parametrize('length', [0, -1, main.MAX_GENERATE_LENGTH + 1, '18', 2.5])
+def test_generate_route_validates_length(length):
+    client = main.app.test_client()
+    assert client.post('/generate', json={'length': length}).status_code == 400
+    assert client.post('/generate/batch', json={'length': length}).status_code == 400
+
+def test_generate_route_default():
+    response = main.app.test_client().post('/generate', json={})
+    assert response.status_code == 200 and len(response.get_json()['password']) == 18
+
+def test_large_batches_must_stream():
+    client = main.app.test_client()
+    body = {'count': main.MAX_BUFFERED_GENERATE_CHARS // 1000 + 1, 'length': 1000}
+    assert client.post('/generate/batch', json=body).status_code == 400
+    response = client.post('/generate/batch', json={**body, 'stream': True})
+    assert response.status_code == 200 and response.is_streamed
+    response.close()
+    fits = client.post('/generate/batch', json={'count': 4, 'length': 1000}).get_json()
+    assert [len(pw) for pw in fits['passwords']] == [1000] * 4
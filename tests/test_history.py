@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+import main
+from storage import SQLiteStore
+
+THREADS = 8
+PER_THREAD = 50
+
+def run_threads(target):
+    errors = []
+
+    def guarded(n):
+        try:
+            target(n)
+        except Exception as exc:  # surfaced in the main thread below
+            errors.append(exc)
+    threads = [threading.Thread(target=guarded, args=(n,)) for n in range(THREADS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not errors, errors
+
+def test_pooled_store_concurrent_writers(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'history.db'))
+
+    def work(n):
+        for i in range(PER_THREAD):
+            store.add_checks([(f'pw-{n}-{i}', 50, 'Medium', 40.0)])
+            if i % 10 == 0:
+                store.add_favorite(f'fav-{n}-{i}')
+                store.history_page(20)
+    run_threads(work)
+    assert store.counts() == (THREADS * PER_THREAD, THREADS * PER_THREAD // 10)
+    rows, cursor = [], None
+    while True:
+        page, cursor = store.history_page(100, main.parse_cursor(cursor))
+        rows += page
+        if not cursor: break
+    assert len(rows) == len({row[0] for row in rows}) == THREADS * PER_THREAD
+    store.close()
+
+def test_flask_threads_share_the_store():
+    # Each thread is its own client, like requests landing on separate
+    # threads of a threaded server.
+    main.history_writer.flush()
+    checks_before, favorites_before = main.get_counts()
+
+    def work(n):
+        client = main.app.test_client()
+        for i in range(PER_THREAD):
+            assert client.post('/check', json={'password': f'Thread{n}-Pw{i}!'}).status_code == 200
+            if i % 10 == 0:
+                assert client.post('/favorite', json={'password': f'Fav{n}-{i}'}).status_code == 200
+                assert client.get('/api/history?limit=5').status_code == 200
+    run_threads(work)
+    main.history_writer.flush()
+    assert main.get_counts() == (checks_before + THREADS * PER_THREAD, favorites_before + THREADS * PER_THREAD // 10)
+    assert main.times_seen('Thread3-Pw7!') == 1
+
+def test_writer_flushes_on_close(monkeypatch):
+    written = []
+    monkeypatch.setattr(main, 'write_checks', written.extend)
+    writer = main.HistoryWriter(batch_size=1000, flush_interval=60)
+    for i in range(250): writer.submit((f'pw{i}', 1, 'Weak', 1.0))
+    writer.close()
+    assert len(written) == writer.written == 250
+
+def test_writer_counts_every_drop(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(main, 'write_checks', lambda rows: release.wait())
+    writer = main.HistoryWriter(batch_size=1, max_pending=1, put_timeout=0.01, wait_timeout=0.2)
+    writer.submit(('held', 1, 'Weak', 1.0))
+
+    def work(n):
+        for i in range(PER_THREAD): writer.submit((f'pw-{n}-{i}', 1, 'Weak', 1.0))
+    run_threads(work)
+    assert not writer.flush()
+    assert writer.stats()['stalls'] == 1
+    release.set()
+    assert writer.flush()
+    writer.close()
+    assert writer.written + writer.dropped == THREADS * PER_THREAD + 1
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_writer_restarts_after_crash(monkeypatch):
+    def crash(rows): raise RuntimeError('boom')
+    monkeypatch.setattr(main, 'write_checks', crash)
+    writer = main.HistoryWriter(batch_size=1, wait_timeout=0.5)
+    writer.submit(('lost', 1, 'Weak', 1.0))
+    writer._thread.join(1)
+    written = []
+    monkeypatch.setattr(main, 'write_checks', written.extend)
+    writer.submit(('kept', 1, 'Weak', 1.0))
+    assert writer.flush()
+    writer.close()
+    assert written == [('kept', 1, 'Weak', 1.0)]
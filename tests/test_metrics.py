@@ -0,0 +1,59 @@
+import subprocess
+import sys
+import threading
+from array import array
+
+import main
+from metrics import Registry
+
+def make_registry(directory=None):
+    registry = Registry(directory)
+    latency = registry.histogram('test_latency_seconds', 'Latency.', route='/x')
+    depth = registry.gauge('test_depth', 'Depth.', queue='history')
+    return registry, latency, depth
+
+def test_gauges_are_exposed_beside_histograms():
+    registry, latency, depth = make_registry()
+    latency.observe(0.002)
+    depth.set(7)
+    depth.set(5)
+    text = registry.exposition()
+    assert '# TYPE test_depth gauge\ntest_depth{queue="history"} 5\n' in text
+    assert 'test_latency_seconds_count{route="/x"} 1' in text
+
+def test_gauges_sum_only_live_processes(tmp_path):
+    registry, latency, depth = make_registry(str(tmp_path))
+    depth.set(3)
+    latency.observe(0.001)
+    # The same slots again under the pid of a process that has exited.
+    exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+    values = array('Q', registry._slots.tobytes())
+    values[depth.offset] = 40
+    (tmp_path / f'{registry.layout}-{int(exited.stdout)}.bin').write_bytes(values.tobytes())
+    text = registry.exposition()
+    assert 'test_depth{queue="history"} 3\n' in text, "an exited worker's gauge must not count"
+    assert 'test_latency_seconds_count{route="/x"} 2' in text, "its histograms still do"
+
+def test_history_writer_backlog_is_on_metrics():
+    main.history_writer.flush()
+    main.history_writer.submit(('queued-for-metrics', 1, 'Weak', 1.0))
+    text = main.app.test_client().get('/metrics').get_data(as_text=True)
+    assert '# TYPE securepass_history_queue_depth gauge' in text
+    assert '# TYPE securepass_history_dropped_rows gauge' in text
+    main.history_writer.flush()
+    text = main.app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'securepass_history_queue_depth 0\n' in text
+    assert f'securepass_history_dropped_rows {main.history_writer.dropped}\n' in text
+
+def test_history_writer_publishes_drops(monkeypatch):
+    registry = Registry()
+    gauges = {'depth': registry.gauge('depth', 'Depth.'), 'dropped': registry.gauge('dropped', 'Dropped.')}
+    release = threading.Event()
+    monkeypatch.setattr(main, 'write_checks', lambda rows: release.wait())
+    writer = main.HistoryWriter(batch_size=1, max_pending=2, put_timeout=0.01, gauges=gauges)
+    for i in range(6): writer.submit((f'pw-{i}', 1, 'Weak', 1.0))
+    text = registry.exposition()
+    assert 'depth 2\n' in text and f'dropped {writer.dropped}\n' in text and writer.dropped >= 3
+    release.set()
+    writer.close()
+    assert 'depth 0\n' in registry.exposition()
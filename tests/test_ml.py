@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+import main
+
+pytest.importorskip('numpy')
+
+@pytest.fixture(scope='module')
+def model():
+    from ml_scorer import MLPScorer
+    if not os.path.exists(main.ML_MODEL_PATH):
+        pytest.skip('advanced_model.pth is not available')
+    return MLPScorer.from_file(main.ML_MODEL_PATH)
+
+WEAK = ['a', '123', 'password', 'qwerty', 'abc123', 'aaaaaa']
+STRONG = ['X9#kLp2!vQz8@Wm4$rT7', 'kT9$wL3@pV6&nR1!yH4^', 'Gq7!zR2#mW9$xL4@']
+
+def predict(model, passwords):
+    return [int(p.argmax()) for p in model.predict_proba([main.ml_features(pw) for pw in passwords])]
+
+def test_feature_vector_shape():
+    assert len(main.ml_features('Password1!')) == main.ML_FEATURES
+    assert main.ml_features('Password1!')[:6] == [10.0, 1.0, 1.0, 1.0, 1.0, main.calculate_entropy('Password1!')]
+
+def test_strong_and_weak_land_in_different_classes(model):
+    weak, strong = predict(model, WEAK), predict(model, STRONG)
+    assert max(weak) <= 1, dict(zip(WEAK, weak))
+    assert min(strong) >= 3, dict(zip(STRONG, strong))
@@ -0,0 +1,34 @@
+import main
+from storage import HashedSQLiteStore
+
+def test_home_is_static_and_revalidates():
+    client = main.app.test_client()
+    first = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200 and first.headers['Content-Encoding'] == 'gzip'
+    client.post('/favorite', json={'password': 'changes the counts'})
+    again = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag'],
+                                     'If-Modified-Since': first.headers['Last-Modified']})
+    assert again.status_code == 304
+    plain = client.get('/')
+    assert plain.headers['ETag'] != first.headers['ETag']
+    assert b'id="historyCount"' in plain.data and b'{{' not in plain.data
+
+def test_counts_endpoint_tracks_the_store():
+    client = main.app.test_client()
+    before = client.get('/api/counts').get_json()
+    client.post('/favorite', json={'password': 'counted'})
+    after = client.get('/api/counts').get_json()
+    assert after == {'history': before['history'], 'favorites': before['favorites'] + 1}
+
+def test_hashed_history_hides_passwords(tmp_path, monkeypatch):
+    client = main.app.test_client()
+    assert client.get('/api/history').get_json()['hashed'] is False
+    store = HashedSQLiteStore(str(tmp_path / 'hashed.db'), b'k' * 32)
+    monkeypatch.setattr(main, 'load_history_store', lambda: store)
+    store.add_checks([('Hidden-1!', 40, 'Medium', 30.0)])
+    client.post('/favorite', json={'password': 'Hidden-1!'})
+    history = client.get('/api/history').get_json()
+    favorites = client.get('/favorites').get_json()
+    assert history['hashed'] and favorites['hashed']
+    assert history['history'][0][:4] == [None, 40, 'Medium', 30.0] and favorites['favorites'][0][0] is None
+    store.close()
@@ -0,0 +1,30 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import main
+from tests.test_scoring import EDGE_CASES, fuzz_corpus
+
+NODE = shutil.which('node')
+
+def browser_engine():
+    # The scorer exactly as the page ships it, rules included.
+    html = main.app.test_client().get('/').get_data(as_text=True)
+    return html[html.index('const STRENGTH_RULES'):html.index('// Scoring happens locally')]
+
+@pytest.mark.skipif(NODE is None, reason='node is not installed')
+def test_browser_scorer_matches_python(tmp_path):
+    passwords = EDGE_CASES + ['😀', 'A' * 63 + '1!'] + fuzz_corpus(seed=3, size=5000)
+    (tmp_path / 'vectors.json').write_text(json.dumps(passwords))
+    (tmp_path / 'run.js').write_text(browser_engine() + """
+const vectors = require('./vectors.json');
+console.log(JSON.stringify(vectors.map(pw => calculateStrength(pw, STRENGTH_RULES))));
+""")
+    results = json.loads(subprocess.run([NODE, 'run.js'], cwd=tmp_path, capture_output=True, check=True).stdout)
+    assert len(results) == len(passwords)
+    for password, got in zip(passwords, results):
+        strength, label, color, suggestions, entropy = main.calculate_strength(password)
+        assert got == {'strength': strength, 'label': label, 'color': color, 'suggestions': suggestions,
+                       'entropy': entropy}, repr(password)
@@ -0,0 +1,39 @@
+import pytest
+
+import main
+import pattern_matcher
+from pattern_matcher import AhoCorasick, MappedAhoCorasick, load_automaton
+
+PATTERNS = ['he', 'she', 'his', 'hers', 'ab', 'abc', 'bc', 'c']
+
+def naive(patterns, text):
+    return sorted((i, i + len(p), p) for p in set(patterns) for i in range(len(text)) if text.startswith(p, i))
+
+def test_overlapping_matches():
+    automaton = AhoCorasick.build(PATTERNS)
+    assert sorted(automaton.find_all('ushers')) == [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+    for text in ('ushers', 'abcabc', 'hishershe', 'xyz', '', 'cccc'):
+        assert sorted(automaton.find_all(text)) == naive(PATTERNS, text), text
+    assert automaton.contains_any('zzabzz') and not automaton.contains_any('zzzz')
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_saved_automaton_round_trips(tmp_path, compact):
+    patterns = PATTERNS + ['pässwörd', 'qwerty']
+    automaton = AhoCorasick.build(patterns)
+    path = str(tmp_path / ('patterns.bin' if compact else 'patterns.json'))
+    automaton.save_compact(path) if compact else automaton.save(path)
+    loaded = load_automaton(path)
+    assert isinstance(loaded, MappedAhoCorasick) == compact
+    for text in ('ushers', 'my pässwörd is qwerty', 'abcabc', 'nothing'):
+        assert sorted(loaded.find_all(text)) == sorted(automaton.find_all(text)), text
+    assert loaded.contains_any('xqwertyx') and not loaded.contains_any('xyz')
+
+def test_patterns_and_lookups_are_case_folded(tmp_path, monkeypatch):
+    words = tmp_path / 'words.txt'
+    words.write_text('Dragon\nMONKEY\nab\n', encoding='utf-8')
+    path = tmp_path / 'patterns.bin'
+    pattern_matcher.main([str(words), '--compact', '-o', str(path)])
+    automaton = load_automaton(str(path))
+    assert sorted(automaton.pattern(i) for i in range(automaton.size)) == ['dragon', 'monkey']
+    monkeypatch.setattr(main, 'load_breach_matcher', lambda: automaton)
+    assert main.check_breach_similarity('xXDrAgOn99') and not main.check_breach_similarity('Tr0ub4dor&3')
@@ -0,0 +1,55 @@
+import itertools
+
+import pytest
+
+import main
+
+# A tiny alphabet, so every password of a few characters can be enumerated.
+GROUPS = [(0, 'ab', False), (1, 'C', False), (2, '12', False), (3, '!', True), (3, '(', False)]
+ALPHABET = ''.join(chars for _, chars, _ in GROUPS)
+
+def compliant(length, minimums, no_triples):
+    for chars in itertools.product(ALPHABET, repeat=length):
+        f = main.analyze_password(''.join(chars))
+        if any(c < m for c, m in zip((f.lower, f.upper, f.digits, f.symbols), minimums)): continue
+        if no_triples and f.has_triple: continue
+        yield ''.join(chars)
+
+@pytest.mark.parametrize('minimums', [(0, 0, 0, 0), (1, 1, 1, 1), (2, 0, 1, 0)])
+@pytest.mark.parametrize('no_triples', [True, False])
+@pytest.mark.parametrize('length', [3, 5])
+def test_counts_every_compliant_password(minimums, no_triples, length):
+    expected = sum(1 for _ in compliant(length, minimums, no_triples))
+    try:
+        total = main.PolicyGenerator(length, GROUPS, minimums, no_triples).total
+    except ValueError:
+        total = 0
+    assert total == expected
+
+def test_outputs_meet_the_policy():
+    policy = {'length': 12, 'min_digits': 2, 'min_symbols': 3, 'min_score': 90}
+    for _ in range(300):
+        password, _ = main.generate_policy_password(**policy)
+        f = main.analyze_password(password)
+        assert len(password) == 12 and f.digits >= 2 and f.symbols >= 3 and not f.has_triple
+        assert main.calculate_strength(password)[0] >= 90
+        assert not set(password) & set(main.AMBIGUOUS_CHARS)
+
+def test_exclude_is_canonical_in_the_cache_key():
+    main.build_policy_generator.cache_clear()
+    main.policy_generator(exclude='zyx')
+    main.policy_generator(exclude='xyzzy')
+    assert main.build_policy_generator.cache_info().currsize == 1
+    assert not set(main.generate_policy_password(exclude='xyz')[0]) & set('xyz')
+
+@pytest.mark.parametrize('policy', [{'length': main.MAX_POLICY_LENGTH + 1}, {'length': 0},
+                                    {'min_digits': main.MAX_POLICY_MINIMUM + 1}])
+def test_limits(policy):
+    with pytest.raises(ValueError):
+        main.policy_generator(**policy)
+    assert main.app.test_client().post('/generate', json={'policy': policy}).status_code == 400
+
+def test_largest_policy_fits_the_table_budget():
+    m = main.MAX_POLICY_MINIMUM
+    generator = main.policy_generator(main.MAX_POLICY_LENGTH, m, m, m, m, no_triples=True)
+    assert len(generator.moves) * (main.MAX_POLICY_LENGTH + 1) <= main.MAX_POLICY_CELLS
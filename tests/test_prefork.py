@@ -0,0 +1,42 @@
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='prefork needs fork()')
+def test_sigterm_flushes_worker_history(tmp_path):
+    db, port = tmp_path / 'history.db', free_port()
+    env = dict(os.environ, HISTORY_STORE=f'sqlite:{db}')
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'prefork.py'), '--port', str(port), '-w', '2'],
+                              env=env, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{port}'
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(url + '/api/counts')
+                break
+            except OSError:
+                time.sleep(0.1)
+        for i in range(20):
+            request = urllib.request.Request(url + '/check', data=json.dumps({'password': f'Worker{i}!'}).encode(),
+                                             headers={'Content-Type': 'application/json'})
+            urllib.request.urlopen(request).read()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(10)
+    # Rows were still in the workers' write-behind queues when SIGTERM came.
+    assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM checks").fetchone()[0] == 20
@@ -0,0 +1,78 @@
+import queue
+import sys
+import threading
+import time
+
+import main
+import profiler
+from storage import SQLiteStore
+
+def blocked_frame(target):
+    ready = threading.Event()
+    thread = threading.Thread(target=lambda: (ready.set(), target()), daemon=True)
+    thread.start()
+    ready.wait()
+    time.sleep(0.05)
+    return thread, sys._current_frames()[thread.ident]
+
+def test_waiting_threads_are_idle():
+    done, jobs = threading.Event(), queue.Queue()
+    for wait, wake in ((done.wait, done.set), (jobs.get, lambda: jobs.put(None))):
+        thread, frame = blocked_frame(wait)
+        assert profiler.is_idle(frame), profiler.collapse(frame)
+        wake()
+        thread.join(1)
+
+def test_busy_threads_are_not_idle():
+    stop = time.monotonic() + 0.2
+
+    def spin():
+        while time.monotonic() < stop: pass
+    thread, frame = blocked_frame(spin)
+    assert not profiler.is_idle(frame)
+    thread.join(1)
+
+def test_signal_handler_never_takes_the_profiler_lock(monkeypatch):
+    # The handler interrupts the main thread, which may be inside track()
+    # holding the lock; it must return without waiting for it.
+    monkeypatch.setenv('PROFILE_SECONDS', '0.05')
+    with main.profiler._lock:
+        started = time.monotonic()
+        main.profile_on_signal()
+        assert time.monotonic() - started < 0.5
+    deadline = time.monotonic() + 2
+    while main.profiler.last is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert main.profiler.last is not None and not main.profiler.active
+
+class Worker:
+    def spin(self, stop):
+        while time.monotonic() < stop: pass
+
+def test_focus_matches_methods_by_name():
+    stop = time.monotonic() + 0.2
+    thread, frame = blocked_frame(lambda: Worker().spin(stop))
+    stack = profiler.collapse(frame)
+    thread.join(1)
+    focus = profiler.breakdown({stack: 3}, 0.001, ('spin', 'Other.unrelated'))
+    assert [name.rsplit(':', 1)[0] for name in focus] == [__name__], focus
+    assert profiler.breakdown({stack: 3}, 0.001, ('Worker.spin',)) == focus
+
+def test_store_methods_show_up_in_the_focus(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'history.db'))
+    sampler = profiler.SamplingProfiler(main.PROFILE_FOCUS, threads=('history-writer',))
+    stop = time.monotonic() + 0.5
+
+    def write():
+        while time.monotonic() < stop:
+            store.add_checks([(f'pw-{i}', 1, 'Weak', 1.0) for i in range(50)])
+    writer = threading.Thread(target=write, name='history-writer', daemon=True)
+    writer.start()
+    sampler.start(seconds=0.3, fraction=0.0, interval=0.002)
+    writer.join(2)
+    deadline = time.monotonic() + 2
+    while sampler.last is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    store.close()
+    assert any(name.endswith('add_checks') and name.startswith('storage:') for name in sampler.last['focus']), \
+        sampler.last['focus']
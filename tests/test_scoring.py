@@ -0,0 +1,90 @@
+import math
+import random
+import re
+
+import pytest
+
+import main
+
+# The regex cascade calculate_strength and calculate_entropy replaced, kept
+# verbatim as the reference the single-pass scanner has to reproduce.
+def reference_entropy(pw):
+    size = 0
+    if re.search(r'[a-z]', pw): size += 26
+    if re.search(r'[A-Z]', pw): size += 26
+    if re.search(r'\d', pw): size += 10
+    if re.search(r'[!@#$%^&*()_+\-=\[\]{};:"\\|,.<>\/?]', pw): size += 32
+    return len(pw) * math.log2(size) if size > 0 else 0
+
+def reference_strength(password):
+    if not password:
+        return 0, "No Password", "#666", [], 0
+    length = len(password)
+    entropy = reference_entropy(password)
+    score = 0
+
+    if length >= 8: score += 20
+    if length >= 12: score += 30
+    if length >= 16: score += 25
+    if length >= 20: score += 15
+
+    if re.search(r'[A-Z]', password): score += 15
+    if re.search(r'[a-z]', password): score += 10
+    if re.search(r'\d', password): score += 15
+    if re.search(r'[!@#$%^&*]', password): score += 25
+
+    score += min(entropy * 1.2, 60)
+
+    if re.search(r'(.)\1\1', password): score -= 30
+    if re.search(r'123|abc|qwe|password|admin|letmein', password.lower()): score -= 50
+
+    score = max(0, min(100, score))
+
+    if score < 40: label, color = "Very Weak", "#ff3b30"
+    elif score < 60: label, color = "Weak", "#ff9500"
+    elif score < 80: label, color = "Moderate", "#ffcc00"
+    elif score < 95: label, color = "Strong", "#34c759"
+    else: label, color = "Very Strong", "#00e676"
+
+    suggestions = []
+    if len(password) < 12: suggestions.append("Use at least 12 characters")
+    if not re.search(r'[A-Z]', password): suggestions.append("Add uppercase letters")
+    if not re.search(r'\d', password): suggestions.append("Include numbers")
+    if not re.search(r'[!@#$%^&*]', password): suggestions.append("Add special symbols")
+    if not suggestions: suggestions = ["Outstanding! Extremely secure password."]
+
+    return round(score), label, color, suggestions, round(entropy, 2)
+
+# Weak fragments, every symbol class, non-ASCII digits (٣ is decimal, ² is
+# not), case-folding oddities (İ lowers to two characters) and newlines,
+# which '.' in the old triple check did not match.
+ALPHABET = 'abcABCxyzXYZ0123456789!@#$%^&*()_+-=[]{};:"\\|,.<>/?~` \n\téÉ٣²İßqwepasswordadminletmein'
+EDGE_CASES = ['', 'a', 'aaa', '\n\n\n', 'a\n\n\nb', 'İİİ', 'password', 'Password1!', '٣٣٣', 'x²y', 'PASSWORD',
+              'Tr0ub4dor&3', 'correcthorsebatterystaple', 'X9#kLp2!vQz8@Wm4$rT7', '😀😀😀', 'a' * 5000 + '!']
+
+def fuzz_corpus(seed=1, size=20000):
+    rnd = random.Random(seed)
+    return [''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 40))) for _ in range(size)]
+
+@pytest.mark.parametrize('password', EDGE_CASES)
+def test_edge_cases_match_reference(password):
+    assert main.calculate_strength(password) == reference_strength(password)
+    assert main.calculate_entropy(password) == reference_entropy(password)
+
+def test_fuzz_matches_reference():
+    for password in fuzz_corpus():
+        assert main.calculate_strength(password) == reference_strength(password), repr(password)
+        assert main.calculate_entropy(password) == reference_entropy(password), repr(password)
+
+def test_batch_matches_single():
+    # Large enough to take the vectorized path, with repeats and empties mixed in.
+    passwords = fuzz_corpus(seed=2, size=5000) + EDGE_CASES + ['İstanbul', 'abcİ', ''] + fuzz_corpus(seed=2, size=50)
+    results = main.calculate_strength_batch(passwords)
+    assert len(results) == len(passwords)
+    for password, result in zip(passwords, results):
+        assert result == main.strength_result(*main.calculate_strength(password)), repr(password)
+        assert type(result['strength']) is int and type(result['entropy']) is type(main.calculate_strength(password)[4])
+
+def test_small_batch_skips_vectors():
+    passwords = ['password', 'X9#kLp2!vQz8@Wm4$rT7', 'password', '']
+    assert main.calculate_strength_batch(passwords) == [main.strength_result(*main.calculate_strength(pw)) for pw in passwords]
@@ -0,0 +1,165 @@
+import pytest
+
+from storage import DIGEST_SIZE, HashedSQLiteStore, LogStore, MemoryStore, SQLiteStore, open_store
+
+KEY = b'k' * 32
+
+# Each backend opens fresh, and the persistent ones reopen the same data.
+BACKENDS = {
+    'memory': (lambda path: MemoryStore(), False),
+    'sqlite': (lambda path: SQLiteStore(str(path / 'history.db')), True),
+    'hashed': (lambda path: HashedSQLiteStore(str(path / 'hashed.db'), KEY), True),
+    'log': (lambda path: LogStore(str(path / 'history.log')), True)
+}
+
+def walk(page, limit):
+    # Follows cursors from the newest row to the oldest.
+    rows, before = [], None
+    while True:
+        chunk, cursor = page(limit, before)
+        rows += chunk
+        if cursor is None:
+            return rows
+        stamp, _, row_id = cursor.rpartition(',')
+        before = (stamp, int(row_id))
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request, tmp_path):
+    make, persistent = BACKENDS[request.param]
+    return (lambda: make(tmp_path)), persistent
+
+def test_empty_store(backend):
+    make, _ = backend
+    store = make()
+    assert store.counts() == (0, 0)
+    assert store.history_page(10) == ([], None)
+    assert store.favorites_page(10) == ([], None)
+    store.close()
+
+def test_pages_and_counts(backend):
+    # The hashed store shows None where the others show the password.
+    make, _ = backend
+    store = make()
+
+    def shown(password): return None if store.hashed else password
+    rows = [(f'pw-{i}', i % 101, 'Weak', i / 4) for i in range(250)]
+    store.add_checks(rows[:1])
+    store.add_checks(rows[1:])
+    for i in range(30):
+        store.add_favorite(f'fav-{i}')
+    assert store.counts() == (250, 30)
+    assert store.seen('pw-7') == 1 and store.seen('pw-250') == 0 and store.seen('fav-1') == 0
+    rows = [(shown(row[0]),) + row[1:] for row in rows]
+
+    page, cursor = store.history_page(100)
+    assert len(page) == 100 and cursor is not None
+    assert tuple(page[0][:4]) == rows[-1]
+    assert len(page[0]) == 5 and len(page[0][4]) == 19
+    assert [tuple(row[:4]) for row in walk(store.history_page, 100)] == rows[::-1], "newest first, complete"
+    assert [tuple(row[:4]) for row in walk(store.history_page, 250)] == rows[::-1], "exact last page"
+    favorites = walk(store.favorites_page, 7)
+    assert [row[0] for row in favorites] == [shown(f'fav-{i}') for i in range(29, -1, -1)]
+    assert all(len(row) == 2 for row in favorites)
+    store.close()
+
+def test_clear_keeps_favorites(backend):
+    make, _ = backend
+    store = make()
+    store.add_checks([(f'pw-{i}', 1, 'Weak', 1.0) for i in range(20)])
+    store.add_favorite('fav')
+    store.clear_history()
+    store.add_checks([('after-clear', 2, 'Weak', 2.0)])
+    assert store.counts() == (1, 1)
+    assert len(walk(store.history_page, 10)) == 1
+    assert store.seen('pw-7') == 0 and store.seen('after-clear') == 1
+    assert len(walk(store.favorites_page, 10)) == 1
+    store.close()
+
+def test_reopen(backend):
+    make, persistent = backend
+    if not persistent:
+        pytest.skip("in-memory store")
+    store = make()
+    store.add_checks([(f'pw-{i}', i, 'Weak', 1.0) for i in range(250)])
+    store.add_favorite('fav')
+    expected = walk(store.history_page, 100)
+    store.close()
+    store = make()
+    assert store.counts() == (250, 1)
+    assert walk(store.history_page, 100) == expected, "reopen lost history"
+    store.add_checks([('after-reopen', 1, 'Weak', 1.0)])
+    assert store.history_page(1)[0][0][1:4] == (1, 'Weak', 1.0), "ids must keep increasing after reopen"
+    store.clear_history()
+    store.close()
+    store = make()
+    assert store.counts() == (0, 1), "clear must persist"
+    store.close()
+
+def test_memory_ring_is_bounded():
+    store = MemoryStore(capacity=100, favorites_capacity=5)
+    store.add_checks([(f'pw-{i}', 1, 'Weak', 1.0) for i in range(250)])
+    for i in range(8):
+        store.add_favorite(f'fav-{i}')
+    assert store.counts() == (100, 5)
+    assert [row[0] for row in walk(store.history_page, 30)] == [f'pw-{i}' for i in range(249, 149, -1)]
+
+def test_log_compaction_and_torn_tail(tmp_path):
+    path = str(tmp_path / 'compact.log')
+    store = LogStore(path, retain=100, compact_min=50)
+    for i in range(10):
+        store.add_checks([(f'pw-{i}-{j}', 1, 'Weak', 1.0) for j in range(40)])
+    store.add_favorite('kept')
+    assert store.compactions > 0, "retention past compact_min must compact"
+    with open(path, encoding='utf-8') as f:
+        assert sum(1 for _ in f) < 2 * 101, "compaction must drop dead records"
+    expected = walk(store.history_page, 100)
+    store.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('["c",99999,"2099-01-01 00:00:00","torn')
+    store = LogStore(path, retain=100, compact_min=50)
+    assert walk(store.history_page, 100) == expected, "replay after compaction and a torn write"
+    assert [row[0] for row in walk(store.favorites_page, 10)] == ['kept']
+    store.add_checks([('after-torn', 1, 'Weak', 1.0)])
+    store.close()
+    assert LogStore(path).history_page(1)[0][0][0] == 'after-torn', "a torn tail must not swallow new records"
+
+def test_hashed_dedupes_and_keeps_no_plaintext(tmp_path):
+    path = str(tmp_path / 'dedupe.db')
+    store = HashedSQLiteStore(path, KEY)
+    store.add_checks([('Secret-1', 10, 'Weak', 20.0), ('Secret-2', 20, 'Weak', 25.0)])
+    store.add_checks([('Secret-1', 11, 'Weak', 21.0), ('Secret-1', 12, 'Weak', 22.0)])
+    store.add_favorite('Secret-2')
+    store.add_favorite('Secret-2')
+    assert store.counts() == (4, 1)
+    assert store.seen('Secret-1') == 3 and store.seen('Secret-2') == 1
+    page = walk(store.history_page, 10)
+    assert sorted(row[1:4] for row in page) == [(12, 'Weak', 22.0), (20, 'Weak', 25.0)]
+    assert all(row[0] is None for row in page + walk(store.favorites_page, 10)), "pages must not expose digests"
+    assert len(store.digest('Secret-1')) == DIGEST_SIZE
+    store.close()
+    assert HashedSQLiteStore(path, b'x' * 32).seen('Secret-1') == 0, "a different key must not match"
+    for suffix in ('', '-wal'):
+        if (tmp_path / ('dedupe.db' + suffix)).exists():
+            assert b'Secret' not in (tmp_path / ('dedupe.db' + suffix)).read_bytes(), "plaintext reached the file"
+    with pytest.raises(ValueError):
+        HashedSQLiteStore(path, None)
+
+def test_open_store_defaults_to_sqlite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = open_store()
+    assert isinstance(store, SQLiteStore) and (tmp_path / 'securepass_history.db').exists()
+    store.close()
+    assert isinstance(open_store('memory:5'), MemoryStore)
+    with pytest.raises(ValueError):
+        open_store('redis:localhost')
+
+def seen_plan(store):
+    with store.pool.connection() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM checks WHERE password = ?", ('x',)).fetchall()
+    store.close()
+    return ' '.join(row[-1] for row in plan)
+
+def test_sqlite_seen_index_is_opt_in(tmp_path):
+    path = str(tmp_path / 'history.db')
+    assert 'idx_checks_password' not in seen_plan(SQLiteStore(path)), "plaintext must not be duplicated by default"
+    assert 'idx_checks_password' in seen_plan(open_store(f'sqlite:{path}', seen_index=True))
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import main
+from main import MemoryBackend, StrengthCache
+
+@pytest.fixture
+def scored(monkeypatch):
+    # Records every password that reaches calculate_strength.
+    calls = []
+    real = main.calculate_strength
+
+    def counting(password):
+        calls.append(password)
+        return real(password)
+    monkeypatch.setattr(main, 'calculate_strength', counting)
+    return calls
+
+def test_hits_and_misses(scored):
+    cache = StrengthCache(maxsize=8)
+    first = cache.get('Tr0ub4dor&3')
+    assert cache.get('Tr0ub4dor&3') == first
+    assert scored == ['Tr0ub4dor&3'], "the second get must not rescore"
+    assert cache.stats() == {'enabled': True, 'size': 1, 'maxsize': 8, 'hits': 1, 'shared_hits': 0, 'misses': 1}
+
+def test_evicts_least_recently_used(scored):
+    cache = StrengthCache(maxsize=2)
+    cache.get('a1')
+    cache.get('b2')
+    cache.get('a1')
+    cache.get('c3')
+    assert cache.stats()['size'] == 2
+    scored.clear()
+    cache.get('a1')
+    cache.get('c3')
+    cache.get('b2')
+    assert scored == ['b2'], "b2 was the least recently used entry"
+
+def test_entries_expire(scored):
+    cache = StrengthCache(maxsize=8, ttl=0.05)
+    cache.get('short-lived')
+    time.sleep(0.1)
+    cache.get('short-lived')
+    assert scored == ['short-lived'] * 2 and cache.stats()['misses'] == 2
+
+def test_disabled_cache_always_scores(scored):
+    cache = StrengthCache(maxsize=0)
+    cache.get('x')
+    cache.get('x')
+    assert scored == ['x', 'x'] and cache.stats()['size'] == 0
+
+def test_shared_tier_fills_a_cold_worker(scored):
+    backend = MemoryBackend()
+    key = b'k' * 32
+    warm, cold = StrengthCache(key=key, backend=backend), StrengthCache(key=key, backend=backend)
+    expected = warm.get('Shared-Pass-1')
+    assert cold.get('Shared-Pass-1') == expected
+    assert scored == ['Shared-Pass-1'] and cold.stats()['shared_hits'] == 1 and cold.stats()['misses'] == 0
+    assert cold.get('Shared-Pass-1') == expected and cold.stats()['hits'] == 1
+    assert not any('Shared-Pass-1' in key for key in backend._data), "the backend must only see digests"
+
+def test_keys_isolate_caches(scored):
+    backend = MemoryBackend()
+    one, two = StrengthCache(key=b'1' * 32, backend=backend), StrengthCache(key=b'2' * 32, backend=backend)
+    one.get('same-password')
+    two.get('same-password')
+    assert len(backend._data) == 2 and two.stats()['shared_hits'] == 0
+    assert scored == ['same-password'] * 2
+
+def test_memory_backend_expires():
+    backend = MemoryBackend()
+    backend.set('kept', 'v')
+    backend.set('gone', 'v', ex=0.05)
+    time.sleep(0.1)
+    assert backend.get('kept') == 'v' and backend.get('gone') is None and backend.get('missing') is None
@@ -0,0 +1,45 @@
+import pytest
+
+import main
+import wordlist
+from wordlist import WordList, build
+
+def test_lookup_and_iteration(tmp_path):
+    path = str(tmp_path / 'words.bin')
+    lines = ['11111\tAbacus\n', 'zebra\n', 'café\n', '\n', 'apple\n', 'well-known\n', 'apple\n', 'x1\n']
+    assert build(lines, path) == 3
+    words = WordList(path)
+    assert len(words) == 3
+    assert [words[i] for i in range(len(words))] == ['abacus', 'apple', 'zebra']
+    assert list(words) == ['abacus', 'apple', 'zebra'], "iteration stops at IndexError"
+    with pytest.raises(IndexError):
+        words[3]
+    with pytest.raises(IndexError):
+        words[-1]
+    passphrase, _ = main.generate_passphrase(words=4, separator='.', wordlist=words)
+    assert all(word in ('abacus', 'apple', 'zebra') for word in passphrase.split('.'))
+    words.close()
+
+def test_empty_list(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    assert build(['1234\n', '\n'], path) == 0
+    words = WordList(path)
+    assert len(words) == 0 and list(words) == []
+    with pytest.raises(ValueError):
+        main.generate_passphrase(wordlist=words)
+    words.close()
+
+def test_missing_empty_and_foreign_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        WordList(str(tmp_path / 'missing.bin'))
+    for name, data in (('zero.bin', b''), ('short.bin', b'SPWORDS1'), ('foreign.bin', b'not a word list at all')):
+        (tmp_path / name).write_bytes(data)
+        with pytest.raises(ValueError, match='not a compiled word list'):
+            WordList(str(tmp_path / name))
+
+def test_cli_builds_a_list(tmp_path, capsys):
+    source = tmp_path / 'eff.txt'
+    source.write_text('11111\tabacus\n11112\tabdomen\n', encoding='utf-8')
+    wordlist.main([str(source), '-o', str(tmp_path / 'eff.bin')])
+    assert capsys.readouterr().out.startswith('2 words')
+    assert len(WordList(str(tmp_path / 'eff.bin'))) == 2
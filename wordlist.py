@@ -0,0 +1,84 @@
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+
+# A compiled word list is a single read-only file:
+#   header           magic, word count
+#   offsets          count + 1 little-endian uint32 byte offsets
+#   words            the words' UTF-8 bytes, back to back
+# It is memory-mapped, so every worker reads the same page-cache copy and a
+# lookup is two offset reads and one slice instead of a Python list of
+# 100k strings per process.
+WORDLIST_MAGIC = b'SPWORDS1'
+WORDLIST_HEADER = struct.Struct('<8sI')
+OFFSET = struct.Struct('<II')
+WORD = re.compile(r'^[a-z]+$')
+
+# ============================= LOOKUP =============================
+class WordList:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            # mmap refuses empty files, so a 0-byte or truncated file fails the same way as a foreign one.
+            if os.fstat(f.fileno()).st_size < WORDLIST_HEADER.size + 4:
+                raise ValueError(f"{path} is not a compiled word list")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = WORDLIST_HEADER.unpack_from(self._data)
+        if magic != WORDLIST_MAGIC:
+            self._data.close()
+            raise ValueError(f"{path} is not a compiled word list")
+        self._base = WORDLIST_HEADER.size + 4 * (self.size + 1)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        start, end = OFFSET.unpack_from(self._data, WORDLIST_HEADER.size + 4 * index)
+        return self._data[self._base + start:self._base + end].decode('utf-8')
+
+    def close(self):
+        self._data.close()
+
+# ============================= BUILD =============================
+def parse_word(line):
+    # Accepts plain lists and diceware lists ("11111<TAB>abacus"). Only
+    # lowercase a-z words are kept, so a passphrase joined with any
+    # non-letter separator splits back into exactly one word sequence.
+    fields = line.split()
+    word = fields[-1].lower() if fields else ''
+    return word if WORD.match(word) else None
+
+def build(lines, path):
+    words = sorted({w for w in map(parse_word, lines) if w})
+    blob = b''.join(w.encode('utf-8') for w in words)
+    offsets, pos = [0], 0
+    for w in words:
+        pos += len(w)
+        offsets.append(pos)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as out:
+        out.write(WORDLIST_HEADER.pack(WORDLIST_MAGIC, len(words)))
+        out.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        out.write(blob)
+    os.replace(tmp, path)
+    return len(words)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a word list into a memory-mapped passphrase dictionary.")
+    parser.add_argument('input', nargs='?', default='-', help="one word per line (diceware format ok), or - for stdin")
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', errors='replace')
+    try:
+        count = build(src, args.output)
+    finally:
+        if src is not sys.stdin: src.close()
+    print(f"{count} words -> {args.output}")
+
+if __name__ == '__main__':
+    main()